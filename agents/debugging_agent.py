@@ -1,9 +1,18 @@
-import google.generativeai as genai
-import os
 import logging
+from config import SAFETY_SETTINGS
+from utils.markdown import strip_code_fences
+from agents.model_pool import ensure_configured, model_pool
 
 log = logging.getLogger(__name__)
 
+SYSTEM_INSTRUCTIONS = """
+        You are a CoderLang Debugging Agent.
+        Your sole purpose is to fix the bug in the code inside the <input_code> tags,
+        based on the provided error message.
+        
+        Provide *only* the fixed, complete Python code. No markdown.
+        """
+
 class DebuggingAgent:
     def __init__(self):
         """
@@ -11,36 +20,19 @@ class DebuggingAgent:
         """
         log.info("Initializing...")
         
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            log.error("GOOGLE_API_KEY not found.")
-            raise ValueError("GOOGLE_API_KEY not found.")
-        
-        genai.configure(api_key=api_key)
+        ensure_configured()
         
-        self.model = genai.GenerativeModel(
+        self.model = model_pool.get_model(
             model_name='gemini-2.5-pro',
-            safety_settings=[
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTIONS
         )
         log.info("Model configured (gemini-2.5-pro).")
         
     def run(self, code_string: str, error_message: str, **kwargs) -> str:
         log.info(f"Received request to fix error: {error_message}")
         
-        # --- FIX: 1. System instructions are separated ---
-        system_instructions = f"""
-        You are a CoderLang Debugging Agent.
-        Your sole purpose is to fix the bug in the code inside the <input_code> tags,
-        based on the provided error message.
-        
-        Provide *only* the fixed, complete Python code. No markdown.
-        """
-        
+        # --- FIX: 1. System instructions are separated (SYSTEM_INSTRUCTIONS) ---
         # --- FIX: 2. User message contains all data parts ---
         user_message = f"""
         <input_code>
@@ -51,14 +43,11 @@ class DebuggingAgent:
         """
 
         try:
-            # --- FIX: 3. Use start_chat to enforce instructions ---
-            chat = self.model.start_chat(history=[
-                {'role': 'user', 'parts': [system_instructions]},
-                {'role': 'model', 'parts': ["OK. I am ready to debug the code."]}
-            ])
+            # --- FIX: 3. Instructions are the model's system_instruction, so the chat starts empty ---
+            chat = self.model.start_chat()
             
             response = chat.send_message(user_message)
-            fixed_code = response.text.strip().replace("```python", "").replace("```", "").strip()
+            fixed_code = strip_code_fences(response.text)
             log.info("Debugging successful.")
             return fixed_code
         except Exception as e:
@@ -1,24 +1,29 @@
-import google.generativeai as genai
-import os
 import logging
 from config import MODEL_NAME, SAFETY_SETTINGS
+from utils.markdown import strip_code_fences
+from agents.model_pool import ensure_configured, model_pool
 
 log = logging.getLogger(__name__)
 
+SYSTEM_INSTRUCTIONS = """
+        You are a CoderLang Documentation Agent.
+        Your sole purpose is to add Python docstrings (PEP 257) to the code provided.
+        
+        You MUST document the code I provide.
+        Do NOT add any other functions or code.
+        Provide *only* the Python code, now updated with your documentation.
+        """
+
 class DocumentationAgent:
     def __init__(self):
         log.info("Initializing Documentation Agent...")
         
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            log.error("GOOGLE_API_KEY not found.")
-            raise ValueError("GOOGLE_API_KEY not found.")
-        
-        genai.configure(api_key=api_key)
+        ensure_configured()
         
-        self.model = genai.GenerativeModel(
+        self.model = model_pool.get_model(
             model_name=MODEL_NAME,
-            safety_settings=SAFETY_SETTINGS
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTIONS
         )
         
     def run(self, code_string: str = "", **kwargs) -> str:
@@ -35,15 +40,6 @@ class DocumentationAgent:
         if not code_string:
             return "Error: No code provided to document."
         
-        system_instructions = f"""
-        You are a CoderLang Documentation Agent.
-        Your sole purpose is to add Python docstrings (PEP 257) to the code provided.
-        
-        You MUST document the code I provide.
-        Do NOT add any other functions or code.
-        Provide *only* the Python code, now updated with your documentation.
-        """
-        
         user_message = f"""
         <input_code>
         {code_string}
@@ -51,20 +47,9 @@ class DocumentationAgent:
         """
         
         try:
-            # Use strict list format for messages
-            messages = [
-                {'role': 'user', 'parts': [system_instructions]},
-                {'role': 'model', 'parts': ["OK. I am ready to document the code."]},
-                {'role': 'user', 'parts': [user_message]}
-            ]
-            
-            response = self.model.generate_content(messages)
-            documented_code = response.text
-            
-            # Clean up markdown
-            documented_code = documented_code.strip()
-            if documented_code.startswith("```"):
-                documented_code = documented_code.replace("```python", "").replace("```", "").strip()
+            # Instructions are the model's system_instruction; only the code is sent
+            response = self.model.generate_content(user_message)
+            documented_code = strip_code_fences(response.text)
 
             log.info("Documentation successful.")
             return documented_code
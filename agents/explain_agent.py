@@ -1,9 +1,17 @@
-import google.generativeai as genai
-import os
 import logging
+from config import SAFETY_SETTINGS
+from agents.model_pool import ensure_configured, model_pool
 
 log = logging.getLogger(__name__)
 
+SYSTEM_INSTRUCTIONS = """
+        You are a CoderLang Explanation Agent.
+        Your sole purpose is to explain the code inside the <input_code> tags.
+        
+        You MUST explain the code I provide in the <input_code> tags.
+        Do NOT explain any other program.
+        """
+
 class ExplainAgent:
     def __init__(self):
         """
@@ -11,21 +19,12 @@ class ExplainAgent:
         """
         log.info("Initializing...")
         
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            log.error("GOOGLE_API_KEY not found.")
-            raise ValueError("GOOGLE_API_KEY not found.")
-        
-        genai.configure(api_key=api_key)
+        ensure_configured()
         
-        self.model = genai.GenerativeModel(
+        self.model = model_pool.get_model(
             model_name='gemini-2.5-pro',
-            safety_settings=[
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTIONS
         )
         log.info("Model configured (gemini-2.5-pro).")
         
@@ -36,29 +35,15 @@ class ExplainAgent:
         if not code_string and topic:
             code_string = f"Concept: {topic}"
         
-        system_instructions = """
-        You are a CoderLang Explanation Agent.
-        Your sole purpose is to explain the code inside the <input_code> tags.
-        
-        You MUST explain the code I provide in the <input_code> tags.
-        Do NOT explain any other program.
-        """
-        
         user_message = f"""
         <input_code>
         {code_string}
         </input_code>
         """
         
-        # --- THE FIX ---
-        messages = [
-            {'role': 'user', 'parts': [system_instructions]},
-            {'role': 'model', 'parts': ["OK. I am ready to explain the code you provide."]},
-            {'role': 'user', 'parts': [user_message]}
-        ]
-        
+        # --- THE FIX: instructions are the model's system_instruction, not a fake first turn ---
         try:
-            response = self.model.generate_content(messages)
+            response = self.model.generate_content(user_message)
             explanation = response.text.strip()
             log.info("Explanation successful.")
             return explanation
@@ -0,0 +1,59 @@
+import os
+import logging
+import threading
+import google.generativeai as genai
+
+log = logging.getLogger(__name__)
+
+_configure_lock = threading.Lock()
+_configured = False
+
+def ensure_configured():
+    """
+    Configures genai with GOOGLE_API_KEY once per process instead of in every agent constructor.
+    Raises ValueError if the key is missing.
+    """
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if _configured:
+            return
+        api_key = os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            log.error("GOOGLE_API_KEY not found.")
+            raise ValueError("GOOGLE_API_KEY not found.")
+        genai.configure(api_key=api_key)
+        _configured = True
+
+def _freeze(safety_settings):
+    """Hashable form of a safety_settings list of dicts."""
+    return tuple(tuple(sorted(s.items())) for s in safety_settings or ())
+
+class ModelPool:
+    """
+    Process-wide cache of GenerativeModel instances shared by every agent.
+    Agents are constructed per request, so without this each one rebuilt an
+    identical model (and its client state) on every construction.
+    """
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, model_name: str, safety_settings=None, system_instruction=None) -> genai.GenerativeModel:
+        """
+        Returns the shared model for this configuration. Each agent passes its module-level
+        SYSTEM_INSTRUCTIONS here, built once at import instead of on every run().
+        """
+        key = (model_name, _freeze(safety_settings), system_instruction)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._models[key] = genai.GenerativeModel(
+                    model_name=model_name,
+                    safety_settings=safety_settings,
+                    system_instruction=system_instruction
+                )
+        return model
+
+model_pool = ModelPool()
@@ -1,9 +1,23 @@
-import google.generativeai as genai
-import os
 import logging
+from config import SAFETY_SETTINGS
+from agents.model_pool import ensure_configured, model_pool
 
 log = logging.getLogger(__name__)
 
+SYSTEM_INSTRUCTIONS = """
+        You are a CoderLang Safety Agent.
+        Your sole purpose is to check the code inside the <input_code> tags.
+        
+        You MUST analyze the code I provide in the <input_code> tags.
+        Do NOT hallucinate or invent risks.
+        
+        Unsafe operations include: 'os.remove', 'subprocess.run', 'eval', 'pickle'.
+        
+        Format your response as:
+        Verdict: [SAFE or UNSAFE]
+        Justification: [Your one-sentence justification]
+        """
+
 class SafetyAgent:
     def __init__(self):
         """
@@ -11,21 +25,12 @@ class SafetyAgent:
         """
         log.info("Initializing...")
         
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            log.error("GOOGLE_API_KEY not found.")
-            raise ValueError("GOOGLE_API_KEY not found.")
-        
-        genai.configure(api_key=api_key)
+        ensure_configured()
         
-        self.model = genai.GenerativeModel(
+        self.model = model_pool.get_model(
             model_name='gemini-2.5-pro',
-            safety_settings=[
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTIONS
         )
         log.info("Model configured (gemini-2.5-pro).")
         
@@ -36,34 +41,14 @@ class SafetyAgent:
         if not code_string:
             code_string = kwargs.get('prompt', kwargs.get('code', ''))
         
-        system_instructions = f"""
-        You are a CoderLang Safety Agent.
-        Your sole purpose is to check the code inside the <input_code> tags.
-        
-        You MUST analyze the code I provide in the <input_code> tags.
-        Do NOT hallucinate or invent risks.
-        
-        Unsafe operations include: 'os.remove', 'subprocess.run', 'eval', 'pickle'.
-        
-        Format your response as:
-        Verdict: [SAFE or UNSAFE]
-        Justification: [Your one-sentence justification]
-        """
-        
         user_message = f"""
         <input_code>
         {code_string}
         </input_code>
         """
         
-        messages = [
-            {'role': 'user', 'parts': [system_instructions]},
-            {'role': 'model', 'parts': ["OK. I am ready to scan the code."]},
-            {'role': 'user', 'parts': [user_message]}
-        ]
-        
         try:
-            response = self.model.generate_content(messages)
+            response = self.model.generate_content(user_message)
             verdict = response.text.strip()
             log.info("Scan successful.")
             return verdict
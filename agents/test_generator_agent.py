@@ -1,9 +1,27 @@
-import google.generativeai as genai
-import os
 import logging
+from config import SAFETY_SETTINGS
+from utils.markdown import strip_code_fences
+from agents.model_pool import ensure_configured, model_pool
 
 log = logging.getLogger(__name__)
 
+SYSTEM_INSTRUCTIONS = """
+        You are a Test Generator Agent.
+        Your sole purpose is to write *simple, runnable* Python tests for the code inside the <input_code> tags.
+        
+        You MUST write tests that can be executed directly by a Python interpreter.
+        Do NOT use the `pytest` library.
+        Use simple `assert` statements within test functions.
+        
+        To make the tests run, you MUST include a main execution block at the end, like:
+        if __name__ == "__main__":
+            # ... call your test functions here ...
+            print("All tests passed!")
+        
+        Provide *only* the Python code for the tests, including the main block.
+        Do not include markdown or '```python' wrappers.
+        """
+
 class TestGeneratorAgent:
     def __init__(self):
         """
@@ -11,21 +29,12 @@ class TestGeneratorAgent:
         """
         log.info("Initializing...")
         
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            log.error("GOOGLE_API_KEY not found.")
-            raise ValueError("GOOGLE_API_KEY not found.")
+        ensure_configured()
         
-        genai.configure(api_key=api_key)
-        
-        self.model = genai.GenerativeModel(
+        self.model = model_pool.get_model(
             model_name='gemini-2.5-pro',
-            safety_settings=[
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTIONS
         )
         log.info("Model configured (gemini-2.5-pro).")
         
@@ -43,45 +52,16 @@ class TestGeneratorAgent:
             return "Error: No code provided to generate tests for."
         # ----------------------------------
         
-        system_instructions = f"""
-        You are a Test Generator Agent.
-        Your sole purpose is to write *simple, runnable* Python tests for the code inside the <input_code> tags.
-        
-        You MUST write tests that can be executed directly by a Python interpreter.
-        Do NOT use the `pytest` library.
-        Use simple `assert` statements within test functions.
-        
-        To make the tests run, you MUST include a main execution block at the end, like:
-        if __name__ == "__main__":
-            # ... call your test functions here ...
-            print("All tests passed!")
-        
-        Provide *only* the Python code for the tests, including the main block.
-        Do not include markdown or '```python' wrappers.
-        """
-        
         user_message = f"""
         <input_code>
         {code_string}
         </input_code>
         """
 
-        messages = [
-            {'role': 'user', 'parts': [system_instructions]},
-            {'role': 'model', 'parts': ["OK. I am ready to generate simple, runnable tests."]},
-            {'role': 'user', 'parts': [user_message]}
-        ]
-
         try:
-            response = self.model.generate_content(messages)
-            unit_tests = response.text
-            
+            response = self.model.generate_content(user_message)
             # Clean up markdown wrappers
-            unit_tests = unit_tests.strip()
-            if unit_tests.startswith("```python"):
-                 unit_tests = unit_tests.replace("```python", "").strip()
-            if unit_tests.endswith("```"):
-                 unit_tests = unit_tests.rstrip("`").strip()
+            unit_tests = strip_code_fences(response.text)
             
             log.info("Test generation successful.")
             return unit_tests
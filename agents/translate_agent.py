@@ -1,9 +1,21 @@
-import google.generativeai as genai
-import os
 import logging
+from config import SAFETY_SETTINGS
+from utils.markdown import strip_code_fences
+from agents.model_pool import ensure_configured, model_pool
 
 log = logging.getLogger(__name__)
 
+SYSTEM_INSTRUCTIONS = """
+        You are a CoderLang Translation Agent.
+        Your sole purpose is to translate the code inside the <input_code> tags
+        into the specified target language.
+        
+        You MUST translate the code I provide in the <input_code> tags.
+        Do NOT translate any other program.
+        
+        Provide *only* the translated code.
+        """
+
 class TranslateAgent:
     def __init__(self):
         """
@@ -11,21 +23,12 @@ class TranslateAgent:
         """
         log.info("Initializing...")
         
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            log.error("GOOGLE_API_KEY not found.")
-            raise ValueError("GOOGLE_API_KEY not found.")
-        
-        genai.configure(api_key=api_key)
+        ensure_configured()
         
-        self.model = genai.GenerativeModel(
+        self.model = model_pool.get_model(
             model_name='gemini-2.5-pro',
-            safety_settings=[
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTIONS
         )
         log.info("Model configured (gemini-2.5-pro).")
         
@@ -42,17 +45,6 @@ class TranslateAgent:
             return "Error: No code provided to translate."
         # ----------------------
         
-        system_instructions = f"""
-        You are a CoderLang Translation Agent.
-        Your sole purpose is to translate the code inside the <input_code> tags
-        into the specified target language.
-        
-        You MUST translate the code I provide in the <input_code> tags.
-        Do NOT translate any other program.
-        
-        Provide *only* the translated code.
-        """
-        
         user_message = f"""
         <input_code>
         {code_string}
@@ -62,16 +54,11 @@ class TranslateAgent:
         """
 
         try:
-            chat = self.model.start_chat(history=[
-                {'role': 'user', 'parts': [system_instructions]},
-                {'role': 'model', 'parts': ["OK. I am ready to translate the code."]}
-            ])
+            chat = self.model.start_chat()
             
             response = chat.send_message(user_message)
-            translated_code = response.text.strip()
-            
-            # Cleanup markdown
-            translated_code = translated_code.replace(f"```{target_language.lower()}", "").replace("```", "").strip()
+            # Cleanup markdown; the fence tag (cpp, c++, js...) need not match target_language
+            translated_code = strip_code_fences(response.text)
             
             log.info("Code translation successful.")
             return translated_code
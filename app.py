@@ -4,10 +4,14 @@ load_dotenv()
 import time
 import os
 import json
+import re
 import asyncio
-from orchestrator.coordinator import Orchestrator
+from orchestrator.router import get_orchestrator
 from memory.memory_store import MemoryStore
 
+# Text after the first "Score:" up to the "/" of "X/10"
+_SCORE_RE = re.compile(r"Score:\s*([^/]*)")
+
 # Page Config
 st.set_page_config(
     page_title="CoderLang Universal",
@@ -68,7 +72,7 @@ def local_storage_manager():
                 del st.query_params["restored_state"]
             
             if "workflow_session" not in st.session_state:
-                orch = Orchestrator()
+                orch = get_orchestrator()
                 st.session_state.workflow_session = orch.create_session(
                     prompt=restored_data["prompt"],
                     state=restored_data["state"]
@@ -164,10 +168,9 @@ def render_message_content(summary, raw, key_suffix=""):
                 with st.expander("💡 Logic Explanation"):
                     st.markdown(summary["explanation"])
         with tab2:
-            eval_text = summary.get("evaluation", "No evaluation.")
-            score = "N/A"
-            if "Score:" in eval_text:
-                score = eval_text.split("Score:")[1].split("/")[0].strip() + "/10"
+            eval_text = summary.get("evaluation") or "No evaluation."
+            score_match = _SCORE_RE.search(eval_text)
+            score = f"{score_match.group(1).strip()}/10" if score_match else "N/A"
             c1, c2, c3 = st.columns(3)
             c1.metric("Quality Score", score)
             c2.metric("Agents Active", len(raw))
@@ -196,11 +199,16 @@ def process_prompt(prompt, is_refinement=False):
     st.session_state.memory.save_message(st.session_state.current_chat_id, "user", prompt)
     
     # 2. Initialize Workflow Session
-    orch = Orchestrator()
+    orch = get_orchestrator()
     st.session_state.workflow_session = orch.create_session(prompt)
     
     st.rerun()
 
+def last_user_prompt():
+    """Content of the most recent user message, or None. Only scanned when a regenerate button is clicked."""
+    msg = next((m for m in reversed(st.session_state.messages) if m["role"] == "user"), None)
+    return msg["content"] if msg else None
+
 # Header
 col1, col2 = st.columns([1, 12])
 with col1:
@@ -270,12 +278,12 @@ with st.sidebar:
             custom_goal = st.text_input("Custom Goal")
             
             if st.button("Analyze", type="primary"):
-                from utils.repo_loader import RepoLoader
+                from utils.repo_loader import RepoLoader, MAX_FILE_CHARS
                 loader = RepoLoader()
-                context = ""
-                for f in st.session_state.repo_files:
-                    content = loader.read_file(st.session_state.repo_path, f)
-                    context += f"\n--- FILE: {f} ---\n{content}\n"
+                context = "".join(
+                    f"\n--- FILE: {f} ---\n{loader.read_file(st.session_state.repo_path, f, max_chars=MAX_FILE_CHARS)}\n"
+                    for f in st.session_state.repo_files
+                )
                 
                 final_goal = custom_goal if custom_goal else analysis_goal
                 full_prompt = f"Analyze the following repository files.\nGOAL: {final_goal}\n\nCONTEXT:\n{context}"
@@ -355,10 +363,11 @@ if "workflow_session" in st.session_state:
         with st.status(f"🚀 Processing: {session.state['stage']}...", expanded=True) as status:
             st.write(f"Current Stage: {session.state['stage']}")
             # Show logs
-            for log in session.state["logs"][-3:]:
+            for log in list(session.state["logs"])[-3:]:
                 st.text(log)
             
-            # Run Next Step
+            # Run Next Step, reporting each agent as it finishes
+            session.on_result = lambda name, res: status.write(f"{'✅' if res.get('ok', True) else '❌'} {name} finished")
             asyncio.run(session.run_next_step())
             
             # Save state implicitly via local_storage_manager on rerun
@@ -396,14 +405,14 @@ if st.session_state.messages and st.session_state.messages[-1]["role"] == "assis
     col1, col2, col3 = st.columns([1, 1, 4])
     with col1:
         if st.button("🔄 Regenerate", help="Re-run the last request"):
-            last_user_msg = next((m for m in reversed(st.session_state.messages) if m["role"] == "user"), None)
-            if last_user_msg:
-                process_prompt(last_user_msg["content"])
+            last_prompt = last_user_prompt()
+            if last_prompt:
+                process_prompt(last_prompt)
     with col2:
         if st.button("✨ Make it Concise", help="Regenerate with a focus on brevity"):
-            last_user_msg = next((m for m in reversed(st.session_state.messages) if m["role"] == "user"), None)
-            if last_user_msg:
-                new_prompt = f"{last_user_msg['content']}\n\n(Please provide a concise, minimal solution)"
+            last_prompt = last_user_prompt()
+            if last_prompt:
+                new_prompt = f"{last_prompt}\n\n(Please provide a concise, minimal solution)"
                 process_prompt(new_prompt)
 
 # Input (Disabled if workflow running)
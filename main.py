@@ -22,6 +22,15 @@ from orchestrator.router import run_orchestrator
 log = logging.getLogger(__name__)
 console = Console()
 
+EXIT_COMMANDS = frozenset({"exit", "quit", "q"})
+
+def show_agent_result(name, result):
+    """Prints each agent's outcome as soon as it finishes, and the generated code right away."""
+    mark = "[green]✓[/green]" if result.get("ok", True) else "[red]✗[/red]"
+    console.print(f"{mark} [dim]{name} finished[/dim]")
+    if name == "CodeGenAgent" and result.get("text"):
+        console.print(Panel(result["text"], title="[bold]Generated Code[/bold]", border_style="cyan"))
+
 def main():
     """
     Main entry point for the CoderLang CLI.
@@ -35,7 +44,7 @@ def main():
     while True:
         user_input = Prompt.ask("\n[bold green]User Request[/bold green]")
         
-        if user_input.lower() in ['exit', 'quit', 'q']:
+        if user_input.lower() in EXIT_COMMANDS:
             console.print("[yellow]Goodbye![/yellow]")
             break
             
@@ -45,11 +54,11 @@ def main():
         console.print(f"[dim]Processing: {user_input}[/dim]")
         
         try:
-            results = run_orchestrator(user_input)
+            results = run_orchestrator(user_input, on_result=show_agent_result)
             
-            # Pretty print the Evaluation Score
-            if "final_evaluation" in results:
-                eval_text = results["final_evaluation"]
+            # Pretty print the Evaluation Score (run_plan returns it in the summary)
+            eval_text = results.get("summary", {}).get("evaluation")
+            if eval_text:
                 color = "green" if "10/10" in eval_text or "9/10" in eval_text else "yellow"
                 console.print(Panel(eval_text, title="[bold]Evaluator Score[/bold]", border_style=color))
             
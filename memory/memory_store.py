@@ -1,12 +1,26 @@
 import json
 import os
+import re
 import logging
-import uuid
 import time
+import secrets
+import itertools
+import concurrent.futures
 from datetime import datetime
 
 log = logging.getLogger(__name__)
 
+# Small shared pool so the long/short term files can be read concurrently.
+# Threads are only spawned on first submit.
+_IO_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-io")
+
+# Cheap pre-parse check for the keys import_chat_session requires
+_CHAT_ID_KEY_RE = re.compile(r'"id"\s*:')
+_CHAT_MESSAGES_KEY_RE = re.compile(r'"messages"\s*:')
+
+# Max age of the memoized get_all_context result, so edits made outside this store are picked up
+CONTEXT_TTL_S = 30.0
+
 class MemoryStore:
     def __init__(self, memory_dir="memory"):
         self.memory_dir = memory_dir
@@ -22,6 +36,11 @@ class MemoryStore:
 
         self._init_file(self.short_term_path)
         self._init_file(self.long_term_path)
+        self._chat_counter = itertools.count()
+        # Bumped on every put(); get_all_context reuses its last result while this is
+        # unchanged and the result is younger than CONTEXT_TTL_S
+        self._version = 0
+        self._context_cache = None
         
     def _init_file(self, filepath):
         if not os.path.exists(filepath):
@@ -51,28 +70,41 @@ class MemoryStore:
         data = self._load(path)
         data[key] = value
         self._save(path, data)
+        self._version += 1
 
     def get_all_context(self):
-        long_term = self._load(self.long_term_path)
+        cached = self._context_cache
+        now = time.monotonic()
+        if cached is not None and cached[0] == self._version and now - cached[1] < CONTEXT_TTL_S:
+            return cached[2]
+        version = self._version
+
+        # Read long term on the pool while this thread parses short term
+        long_term_future = _IO_POOL.submit(self._load, self.long_term_path)
         short_term = self._load(self.short_term_path)
+        long_term = long_term_future.result()
         
-        context_str = ""
+        parts = []
         if long_term:
-            context_str += "User Preferences (Long Term Memory):\n"
-            for k, v in long_term.items():
-                context_str += f"- {k}: {v}\n"
+            parts.append("User Preferences (Long Term Memory):\n")
+            parts.extend(f"- {k}: {v}\n" for k, v in long_term.items())
         
         if short_term:
-            context_str += "\nCurrent Session Context (Short Term Memory):\n"
-            for k, v in short_term.items():
-                context_str += f"- {k}: {v}\n"
+            parts.append("\nCurrent Session Context (Short Term Memory):\n")
+            parts.extend(f"- {k}: {v}\n" for k, v in short_term.items())
                 
-        return context_str
+        context = "".join(parts)
+        self._context_cache = (version, now, context)
+        return context
 
     # --- Chat Session Management ---
 
+    def _new_chat_id(self):
+        """Creation time + per-store counter + a few random bytes; unique without a full UUID."""
+        return f"{int(time.time()):x}-{next(self._chat_counter):x}-{secrets.token_hex(4)}"
+
     def create_chat_session(self, title="New Chat"):
-        session_id = str(uuid.uuid4())
+        session_id = self._new_chat_id()
         timestamp = datetime.now().isoformat()
         chat_data = {
             "id": session_id,
@@ -92,14 +124,15 @@ class MemoryStore:
             return
 
         chat_data = self._load(filepath)
+        now = datetime.now().isoformat()
         message = {
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now,
             "metadata": metadata or {}
         }
         chat_data["messages"].append(message)
-        chat_data["updated_at"] = datetime.now().isoformat()
+        chat_data["updated_at"] = now
         
         # Auto-update title if it's the first user message and title is default
         if role == "user" and len(chat_data["messages"]) == 1 and chat_data["title"] == "New Chat":
@@ -119,16 +152,16 @@ class MemoryStore:
         if not os.path.exists(self.chats_dir):
             return []
             
-        for filename in os.listdir(self.chats_dir):
-            if filename.endswith(".json"):
-                filepath = os.path.join(self.chats_dir, filename)
-                chat_data = self._load(filepath)
-                if chat_data:
-                    sessions.append({
-                        "id": chat_data.get("id"),
-                        "title": chat_data.get("title", "Untitled"),
-                        "updated_at": chat_data.get("updated_at", "")
-                    })
+        with os.scandir(self.chats_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    chat_data = self._load(entry.path)
+                    if chat_data:
+                        sessions.append({
+                            "id": chat_data.get("id"),
+                            "title": chat_data.get("title", "Untitled"),
+                            "updated_at": chat_data.get("updated_at", "")
+                        })
         
         # Sort by updated_at descending
         sessions.sort(key=lambda x: x["updated_at"], reverse=True)
@@ -155,6 +188,11 @@ class MemoryStore:
         """Imports a chat session from a JSON string or dict."""
         try:
             if isinstance(json_data, str):
+                # Reject payloads that cannot contain the required keys before paying for a full parse
+                if not json_data.lstrip().startswith("{"):
+                    return False, "Invalid chat format: Expected a JSON object"
+                if not (_CHAT_ID_KEY_RE.search(json_data) and _CHAT_MESSAGES_KEY_RE.search(json_data)):
+                    return False, "Invalid chat format: Missing 'id' or 'messages'"
                 data = json.loads(json_data)
             else:
                 data = json_data
@@ -182,9 +220,9 @@ class MemoryStore:
         }
         
         if os.path.exists(self.chats_dir):
-            for filename in os.listdir(self.chats_dir):
-                if filename.endswith(".json"):
-                    filepath = os.path.join(self.chats_dir, filename)
-                    dump["chats"].append(self._load(filepath))
+            with os.scandir(self.chats_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        dump["chats"].append(self._load(entry.path))
         
         return dump
\ No newline at end of file
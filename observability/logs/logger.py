@@ -7,8 +7,7 @@ LOG_FILE = os.path.join(os.path.dirname(__file__), 'logs', 'events.log')
 LOG_DIR = os.path.join(os.path.dirname(__file__), 'logs')
 
 # Ensure the log directory exists
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
+os.makedirs(LOG_DIR, exist_ok=True)
 
 # Configure the root logger to output to both console and file
 def setup_logging():
@@ -48,12 +47,28 @@ setup_logging()
 # log = logging.getLogger(__name__)
 # log.info("...")
 
+def _tail_bytes(f, n_lines: int, chunk_size: int = 8192) -> bytes:
+    """Walks backwards from the end of a binary file until N lines are buffered."""
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    buf = b""
+    # One extra newline is needed because the file normally ends with one
+    while pos > 0 and buf.count(b"\n") <= n_lines:
+        step = min(chunk_size, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+    return buf
+
 # Utility function for the main demo
 def tail_logs(n_lines: int = 20) -> str:
     """Reads and returns the last N lines of the events log file."""
+    if n_lines <= 0:
+        return ""
     try:
-        with open(LOG_FILE, 'r') as f:
-            lines = f.readlines()
+        with open(LOG_FILE, 'rb') as f:
+            buf = _tail_bytes(f, n_lines)
+        lines = buf.decode('utf-8', errors='replace').splitlines(keepends=True)
         return "".join(lines[-n_lines:])
     except FileNotFoundError:
         return "Log file not found."
@@ -2,17 +2,56 @@ import json
 import time
 import os
 import logging
+import threading
+import atexit
+import struct
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
 from typing import Dict, Any
 
+# fcntl is POSIX-only; without it updates are only serialised within one process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 log = logging.getLogger(__name__)
 
 METRICS_FILE = os.path.join(os.path.dirname(__file__), 'metrics.json')
+# flock()ed around every shared counter update and every file flush, across processes
+LOCK_FILE = METRICS_FILE + '.lock'
+FLUSH_INTERVAL = 5.0  # seconds between background flushes of dirty metrics
+
+# Request counters are packed into a named shared-memory block so every worker
+# process increments the same numbers without touching the JSON file. The block is
+# never unlinked: a process that exits cannot know whether others are still attached,
+# and a second block seeded from disk would split the counts.
+SHM_NAME = "coderlang_metrics"
+# total_requests, successful_requests, failed_requests, total_latency (microseconds)
+_COUNTERS = struct.Struct("<4Q")
+# Only POSIX SharedMemory registers with multiprocessing's resource_tracker
+_TRACKED = os.name == "posix"
 
 class MetricsTracker:
-    def __init__(self):
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL):
         self.metrics_file = METRICS_FILE
         self._ensure_file()
 
+        # Counters live in memory; the file is only touched by flush()
+        self._lock = threading.Lock()
+        self._lock_fd = os.open(LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        self._data = self._load()
+        # Agent usage increments not yet merged into the file, which other processes also update
+        self._usage_delta: Dict[str, int] = {}
+        self._dirty = False
+        with self._interprocess_lock():
+            self._shm = self._attach_counters()
+
+        # The flusher thread and exit hook only start once something is recorded
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._flusher = None
+
     def _ensure_file(self):
         if not os.path.exists(self.metrics_file):
             with open(self.metrics_file, 'w') as f:
@@ -38,31 +77,117 @@ class MetricsTracker:
         except Exception as e:
             log.error(f"Failed to save metrics: {e}")
 
+    @contextmanager
+    def _interprocess_lock(self):
+        """Held together with self._lock (taken first) so no process interleaves an update."""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _attach_counters(self) -> shared_memory.SharedMemory:
+        """
+        Attaches to the shared counter block, creating and seeding it from disk if needed.
+        Runs under the interprocess lock, so only one process can create it.
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=SHM_NAME)
+        except FileNotFoundError:
+            shm = shared_memory.SharedMemory(name=SHM_NAME, create=True, size=_COUNTERS.size)
+            _COUNTERS.pack_into(
+                shm.buf, 0,
+                int(self._data.get("total_requests", 0)),
+                int(self._data.get("successful_requests", 0)),
+                int(self._data.get("failed_requests", 0)),
+                int(self._data.get("total_latency", 0.0) * 1e6),
+            )
+        # SharedMemory registers the block with resource_tracker, which unlinks it when *any*
+        # registering process exits (and processes started by multiprocessing share one tracker)
+        if _TRACKED:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+    def _read_counters(self) -> Dict[str, Any]:
+        total, ok, failed, latency_us = _COUNTERS.unpack_from(self._shm.buf, 0)
+        return {
+            "total_requests": total,
+            "successful_requests": ok,
+            "failed_requests": failed,
+            "total_latency": latency_us / 1e6,
+        }
+
+    def _start_flusher(self):
+        """Starts the background flusher and exit hook on first use; called with self._lock held."""
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the shared counters to disk and merges this process's agent usage into the
+        file's, if anything changed since the last flush.
+        """
+        with self._lock, self._interprocess_lock():
+            if not self._dirty:
+                return
+            snapshot = self._read_counters()
+            usage = dict(self._load().get("agent_usage", {}))
+            for agent_name, count in self._usage_delta.items():
+                usage[agent_name] = usage.get(agent_name, 0) + count
+            snapshot["agent_usage"] = usage
+            self._save(snapshot)
+            self._usage_delta.clear()
+            self._dirty = False
+
+    def close(self):
+        """Stops the background flusher, writes any pending counters and detaches from the block."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._dirty = True
+        self.flush()
+        if self._flusher is not None:
+            atexit.unregister(self.close)
+        self._shm.close()
+        os.close(self._lock_fd)
+
     def record_request(self, duration: float, success: bool):
-        data = self._load()
-        data["total_requests"] = data.get("total_requests", 0) + 1
-        
-        if success:
-            data["successful_requests"] = data.get("successful_requests", 0) + 1
-        else:
-            data["failed_requests"] = data.get("failed_requests", 0) + 1
-            
-        data["total_latency"] = data.get("total_latency", 0.0) + duration
-        self._save(data)
+        with self._lock, self._interprocess_lock():
+            total, ok, failed, latency_us = _COUNTERS.unpack_from(self._shm.buf, 0)
+            total += 1
+
+            if success:
+                ok += 1
+            else:
+                failed += 1
+
+            latency_us += int(duration * 1e6)
+            _COUNTERS.pack_into(self._shm.buf, 0, total, ok, failed, latency_us)
+            self._dirty = True
+            self._start_flusher()
 
     def record_agent_usage(self, agent_name: str):
-        data = self._load()
-        usage = data.get("agent_usage", {})
-        usage[agent_name] = usage.get(agent_name, 0) + 1
-        data["agent_usage"] = usage
-        self._save(data)
+        with self._lock:
+            self._usage_delta[agent_name] = self._usage_delta.get(agent_name, 0) + 1
+            self._dirty = True
+            self._start_flusher()
 
     def get_summary(self):
-        data = self._load()
+        with self._lock:
+            data = self._read_counters()
         total = data.get("total_requests", 1)
         avg_latency = data.get("total_latency", 0) / total if total > 0 else 0
         return {
             "Total Requests": total,
             "Success Rate": f"{(data.get('successful_requests', 0) / total) * 100:.1f}%",
             "Avg Latency": f"{avg_latency:.2f}s"
-        }
\ No newline at end of file
+        }
@@ -1,14 +1,28 @@
+import collections
+import io
 import json
 import os
 import time
+import weakref
+
+# orjson is optional; fall back to compact stdlib JSON encoded to bytes
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    orjson = None
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
 
 # Define the trace file path
 TRACE_FILE = os.path.join(os.path.dirname(__file__), 'traces', 'traces.json')
 TRACE_DIR = os.path.join(os.path.dirname(__file__), 'traces')
+TRACE_BUFFER_SIZE = 64 * 1024  # bytes buffered in memory before the trace file is written
+TRACE_MEMORY_EVENTS = 200  # recent events kept in memory for show_trace; the NDJSON file has them all
+TRACE_FLUSH_INTERVAL = 1.0  # seconds; buffered events older than this are flushed on the next record
 
 # Ensure the trace directory exists
-if not os.path.exists(TRACE_DIR):
-    os.makedirs(TRACE_DIR)
+os.makedirs(TRACE_DIR, exist_ok=True)
 
 class Tracer:
     """
@@ -17,7 +31,22 @@ class Tracer:
     """
     def __init__(self, session_id: str = None):
         self.session_id = session_id if session_id else f"session-{int(time.time())}"
-        self.trace = []
+        # Only the most recent events stay in memory; the NDJSON file is the full record
+        self.trace = collections.deque(maxlen=TRACE_MEMORY_EVENTS)
+        self._event_count = 0
+        # Events are streamed to disk as NDJSON. Writes are buffered, so a hard crash can lose
+        # up to TRACE_BUFFER_SIZE bytes or TRACE_FLUSH_INTERVAL seconds of the most recent events.
+        self.trace_path = os.path.join(TRACE_DIR, f"{self.session_id}.jsonl")
+        self._fh = io.BufferedWriter(io.FileIO(self.trace_path, "a"), buffer_size=TRACE_BUFFER_SIZE)
+        self._last_flush = time.monotonic()
+        # Closes (and flushes) the file if the tracer is dropped or the interpreter exits without close()
+        self._finalizer = weakref.finalize(self, self._fh.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def record_event(self, source_agent: str, target_agent: str, action: str, details: dict = None):
         """
@@ -37,28 +66,42 @@ class Tracer:
             "details": details if details is not None else {}
         }
         self.trace.append(event)
+        self._event_count += 1
+        # One pre-serialized write per event; the BufferedWriter batches them into few syscalls
+        self._fh.write(_dumps(event) + b"\n")
+        now = time.monotonic()
+        if now - self._last_flush >= TRACE_FLUSH_INTERVAL:
+            self._fh.flush()
+            self._last_flush = now
 
     def save_trace(self):
-        """Saves the current session trace to a file."""
+        """Flushes the streamed session trace to its NDJSON file."""
         try:
-            # We don't want to overwrite the main TRACE_FILE; save it to a session-specific name
-            filename = os.path.join(TRACE_DIR, f"{self.session_id}.json")
-            with open(filename, 'w') as f:
-                json.dump(self.trace, f, indent=2)
-            print(f"Trace saved for session {self.session_id} to {filename}")
+            # We don't want to overwrite the main TRACE_FILE; events go to a session-specific name
+            self._fh.flush()
+            self._last_flush = time.monotonic()
+            print(f"Trace saved for session {self.session_id} to {self.trace_path}")
         except Exception as e:
             print(f"Error saving trace: {e}")
+
+    def close(self):
+        """Flushes and closes the trace file. No further events can be recorded."""
+        self._finalizer()
             
     def show_trace(self) -> str:
-        """Formats the trace events into a readable string timeline."""
-        output = [f"--- Trace for Session: {self.session_id} ---"]
-        for i, event in enumerate(self.trace):
-            detail_snippet = f"({event['details'].get('status', event['details'].get('error', 'OK'))})"
-            
-            output.append(
-                f"[{i+1:02d}] {event['source']:<15} -> {event['target']:<15} : {event['action']:<20} {detail_snippet}"
+        """Formats the most recent trace events into a readable string timeline."""
+        buf = io.StringIO()
+        buf.write(f"--- Trace for Session: {self.session_id} ---")
+        first = self._event_count - len(self.trace) + 1
+        if first > 1:
+            buf.write(f"\n... {first - 1} earlier events in {self.trace_path}")
+        for i, event in enumerate(self.trace, first):
+            details = event["details"]
+            snippet = details["status"] if "status" in details else details.get("error", "OK")
+            buf.write(
+                f"\n[{i:02d}] {event['source']:<15} -> {event['target']:<15} : {event['action']:<20} ({snippet})"
             )
-        return "\n".join(output)
+        return buf.getvalue()
 
 # Placeholder: You would instantiate this in coordinator.py's __init__
 # self.tracer = Tracer()
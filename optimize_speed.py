@@ -1,12 +1,19 @@
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 # Define the directories to scan
 DIRECTORIES = ["agents", "orchestrator"]
 
+# Matches: model_name='gemini-...' or "gemini-..."
+_MODEL_RE = re.compile(r"model_name=['\"]gemini-.*?['\"]")
+# Matches the safety_settings list of dicts; [^\]] stops at the closing bracket without backtracking
+_SAFETY_RE = re.compile(r"safety_settings=\[\s*\{[^\]]*\}\s*,?\s*\]")
+
 def optimize_file(filepath):
     with open(filepath, "r") as f:
         content = f.read()
+    original = content
 
     # 1. Inject the config import if missing
     if "from config import" not in content:
@@ -17,21 +24,15 @@ def optimize_file(filepath):
             content = "from config import MODEL_NAME, SAFETY_SETTINGS\n" + content
 
     # 2. Replace hardcoded model_name with config variable
-    # Regex looks for: model_name='gemini-...' or "gemini-..."
-    content = re.sub(
-        r"model_name=['\"]gemini-.*?['\"]", 
-        "model_name=MODEL_NAME", 
-        content
-    )
+    content = _MODEL_RE.sub("model_name=MODEL_NAME", content)
 
     # 3. Replace hardcoded safety_settings with config variable
-    # This matches the list structure roughly
-    content = re.sub(
-        r"safety_settings=\[\s*\{.*?\}\s*\]", 
-        "safety_settings=SAFETY_SETTINGS", 
-        content, 
-        flags=re.DOTALL
-    )
+    content = _SAFETY_RE.sub("safety_settings=SAFETY_SETTINGS", content)
+
+    # Skip the write entirely when nothing matched
+    if content == original:
+        print(f"⏭️  Unchanged: {filepath}")
+        return
 
     with open(filepath, "w") as f:
         f.write(content)
@@ -40,14 +41,20 @@ def optimize_file(filepath):
 def main():
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     
+    paths = []
     for d in DIRECTORIES:
         dir_path = os.path.join(base_dir, d)
         if not os.path.exists(dir_path):
             continue
             
-        for filename in os.listdir(dir_path):
-            if filename.endswith(".py") and filename != "__init__.py":
-                optimize_file(os.path.join(dir_path, filename))
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".py") and entry.name != "__init__.py":
+                    paths.append(entry.path)
+
+    # Files are independent read-modify-writes, so overlap their disk I/O
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(optimize_file, paths))
 
     print("\n🚀 All agents upgraded to use 'config.MODEL_NAME'.")
 
@@ -1,18 +1,40 @@
 import asyncio
+import atexit
+import collections
 import concurrent.futures
 import hashlib
 import json
 import logging
 import os
+import re
+import threading
 import time
-from typing import Any, Dict, List, Optional
+import weakref
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, FrozenSet, Optional, Tuple
 
 # Import Google GenAI and Dotenv
 import google.generativeai as genai
 from dotenv import load_dotenv
 
-# Import specific agents if they exist, otherwise we simulate them
-from agents.research_agent import ResearchAgent
+from agents.model_pool import ensure_configured, model_pool
+from config import SAFETY_SETTINGS
+from orchestrator.plan_cache import EMBED_MODEL, PlanCache
+from orchestrator.load_monitor import LoadMonitor
+from orchestrator.rate_limiter import RateLimiter
+from tools.run_code import clear_run_cache
+from tools.static_safety import find_risky_constructs
+
+# orjson is optional; fall back to compact stdlib JSON
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    _loads = json.loads
 
 load_dotenv()
 
@@ -21,17 +43,63 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 
 CACHE_DIR = "/tmp/coderlang_cache"
 os.makedirs(CACHE_DIR, exist_ok=True)
+# Set CODERLANG_CACHE=1 to memoize successful LLM responses on disk
+CACHE_ENABLED = os.environ.get("CODERLANG_CACHE") == "1"
+# Set CODERLANG_PLAN_CACHE=0 to always call the LLM router
+PLAN_CACHE_ENABLED = os.environ.get("CODERLANG_PLAN_CACHE", "1") != "0"
 
 # ========== Config ==========
 MODEL_FAST = "gemini-2.0-flash"       # Speed (Router, Chat, Tests, Docs)
 MODEL_HEAVY = "gemini-2.0-flash"      # Intelligence (Coding, Complex Debugging) - Switched to Flash due to Pro quota limits during testing
 
-SAFETY_SETTINGS = [
-    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-]
+MAX_SESSION_LOGS = 500  # older session log lines are dropped
+
+# Concurrent LLM calls per Orchestrator, the process-wide request budget (Gemini tier QPM),
+# and the process-wide cap on calls in flight to any one model
+MAX_PARALLEL_LLM = int(os.getenv("ORCH_MAX_PARALLEL", "16"))
+RATE_LIMIT_QPM = int(os.getenv("ORCH_RATE_LIMIT_QPM", "500"))
+MAX_PER_MODEL = int(os.getenv("ORCH_MAX_PER_MODEL", "16"))
+
+# ========== Local Router Short-Circuit ==========
+# Prompts that clearly need no specialist agents skip the LLM router entirely.
+_ROUTER_CODE_RE = re.compile(
+    r"\b(code|function|class|implement|write|fix|debug|bug|algorithm|python|c\+\+|java|script|program)\b", re.I
+)
+_ROUTER_TRIVIAL_RE = re.compile(r"^\s*(hi|hello|hey|yo|thanks|thank you|ok|okay)\s*[!.?]?\s*$", re.I)
+_ROUTER_SHORT_PROMPT = 80  # chars; shorter prompts without code keywords are treated as chat
+
+# Fixed-shape requests mapped straight to the plan the router would produce; first match wins.
+# Each pattern must cover the whole (single-line) prompt, and any prompt asking for more than
+# one thing goes to the router instead.
+_LANG = r"(python|c\+\+|cpp|c#|c|java|javascript|js|typescript|ts|go|golang|rust|ruby|kotlin|swift|php|scala)"
+_PLAN_TEMPLATES = (
+    (re.compile(r"translate\s+(this|the|my|a|an)?\s*(python\s+|\w+\s+)?(code|function|class|script|program|snippet)\b[^\n]*\bto\s+" + _LANG + r"\s*[.!?]?", re.I),
+     "Translate code", ("CodeGenAgent", "TranslateAgent", "SafetyAgent", "EvaluatorAgent")),
+    (re.compile(r"(write|create|generate|add)\s+(some\s+)?(unit ?tests?|pytest tests?|unittests?)\b[^\n]*", re.I),
+     "Write code with tests", ("CodeGenAgent", "TestGenAgent", "SafetyAgent", "EvaluatorAgent")),
+    (re.compile(r"(write|create|implement|build)\s+(me\s+)?((a|an|the)\s+)?([\w+#-]+\s+){0,2}?(function|class|script|program)\b[^\n]*", re.I),
+     "Write code", ("CodeGenAgent", "SafetyAgent", "EvaluatorAgent")),
+    (re.compile(r"(explain|what does)\s+(this|the|my)\s+(code|function|class|script|program|snippet)\b[^\n]*", re.I),
+     "Explain", ("ExplainAgent",)),
+)
+# A conjunction or a second action verb means a compound request the templates would truncate
+_COMPOUND_RE = re.compile(r"\b(and|also|then|plus|as well as)\b|[;&]", re.I)
+_ACTION_VERB_RE = re.compile(
+    r"\b(write|create|generate|add|implement|build|explain|translate|document|test|refactor|fix|debug|optimi[sz]e|convert|describe|review)\b", re.I
+)
+
+def quick_route(prompt: str) -> Optional[Dict]:
+    """Returns a precomputed plan for chat and fixed-shape prompts, or None if the LLM router is needed."""
+    if _ROUTER_TRIVIAL_RE.match(prompt):
+        return {"intent_summary": "General chat", "agents_to_run": ["GeneralAgent"], "parallelizable": False}
+    text = prompt.strip()
+    if not _COMPOUND_RE.search(text) and len(_ACTION_VERB_RE.findall(text)) == 1:
+        for pattern, intent, agents in _PLAN_TEMPLATES:
+            if pattern.fullmatch(text):
+                return {"intent_summary": intent, "agents_to_run": list(agents), "parallelizable": True}
+    if len(prompt) < _ROUTER_SHORT_PROMPT and not _ROUTER_CODE_RE.search(prompt):
+        return {"intent_summary": "General chat", "agents_to_run": ["GeneralAgent"], "parallelizable": False}
+    return None
 
 # ========== Universal System Prompts ==========
 SYSTEM_PROMPTS = {
@@ -71,11 +139,241 @@ SYSTEM_PROMPTS = {
     "ExplainAgent": "Explain the solution's logic and architecture concisely.",
 
     # --- STAGE 3: JUDGE ---
-    "EvaluatorAgent": "Evaluate the solution (Code, Tests, Docs). Score 1-10. Format: 'Score: X/10. Justification: ...'"
+    "EvaluatorAgent": "Evaluate the solution (Code, Tests, Docs). Score 1-10. Format: 'Score: X/10. Justification: ...'",
+
+    # --- STAGE 2 + 3 FUSED: used when the judge would only see the request and the code ---
+    "SafetyEvaluator": """
+    First check the code for unsafe operations (exec, eval, infinite loops), then evaluate how well it solves the original request.
+    Reply with exactly two lines:
+    Verdict: SAFE/UNSAFE. <one-sentence reason>
+    Score: X/10. Justification: <one sentence>
+    """
 }
 
+# Strip once at import and freeze so prompts are never re-processed or mutated per call
+SYSTEM_PROMPTS = MappingProxyType({name: text.strip() for name, text in SYSTEM_PROMPTS.items()})
+
+# Agent -> (task name, model, max_tokens, agents whose output it consumes).
+# Dependencies that are not in the plan count as met.
+AGENT_DAG = MappingProxyType({
+    "ResearchAgent": ("Research", MODEL_FAST, 2000, ()),
+    "GeneralAgent": ("Chat", MODEL_FAST, 2000, ()),
+    "ExplainAgent": ("Explain", MODEL_FAST, 2000, ()),
+    "CodeGenAgent": ("CodeGen", MODEL_HEAVY, 4000, ()),
+    "SafetyAgent": ("SafetyAgent", MODEL_FAST, 2000, ("CodeGenAgent",)),
+    "TestGenAgent": ("TestGenAgent", MODEL_FAST, 2000, ("CodeGenAgent",)),
+    "DocstringAgent": ("DocstringAgent", MODEL_FAST, 2000, ("CodeGenAgent",)),
+    "TranslateAgent": ("TranslateAgent", MODEL_FAST, 2000, ("CodeGenAgent",)),
+    # Judges the final code and tests, so it overlaps Explain/Research/Translate/Safety
+    "EvaluatorAgent": ("Evaluator", MODEL_FAST, 2000, ("CodeGenAgent", "TestGenAgent", "DocstringAgent")),
+})
+
+_JSON_DECODER = json.JSONDecoder()
+
+def _parse_plan(text: str) -> Dict:
+    """
+    Decodes the first JSON object in a router response, ignoring stray fences or trailing text.
+    If the object itself is malformed, the agents_to_run array is salvaged on its own.
+    """
+    # Common case: the router returned bare JSON, so no scanning is needed
+    try:
+        plan = _loads(text)
+        if isinstance(plan, dict):
+            return plan
+    except ValueError:
+        pass
+    txt = text.strip()
+    start = txt.find("{")
+    try:
+        if start < 0:
+            raise ValueError("no JSON object in router response")
+        plan, _ = _JSON_DECODER.raw_decode(txt, start)
+        return plan
+    except ValueError:
+        # Malformed elsewhere (stray comma, truncated tail): keep the plan if agents_to_run is intact
+        plan = _plan_from_partial(txt)
+        if plan is None:
+            raise
+        return plan
+
+KNOWN_AGENTS = frozenset(AGENT_DAG)
+
+def _validate_plan(plan: Dict) -> Dict:
+    """
+    Checks a router plan once before anything runs: unknown agents are dropped, duplicates
+    removed, and the mandatory Safety/Evaluator companions of CodeGen are added.
+    Raises ValueError if the plan is not usable at all.
+    """
+    if not isinstance(plan, dict):
+        raise ValueError("plan is not a JSON object")
+    agents = plan.get("agents_to_run", ["GeneralAgent"])
+    if not isinstance(agents, list):
+        raise ValueError("agents_to_run is not a list")
+
+    valid = [a for a in dict.fromkeys(agents) if isinstance(a, str) and a in KNOWN_AGENTS]
+    if len(valid) != len(agents):
+        log.warning("Router plan contained unknown or duplicate agents: %s", agents)
+    if "CodeGenAgent" in valid:
+        valid.extend(a for a in ("SafetyAgent", "EvaluatorAgent") if a not in valid)
+    if not valid:
+        raise ValueError("no known agents in plan")
+
+    plan["agents_to_run"] = valid
+    plan.setdefault("parallelizable", False)
+    return plan
+
+# Constrained decoding for the router: JSON only, no fences, agent names limited to KNOWN_AGENTS
+_ROUTER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent_summary": {"type": "string"},
+        "agents_to_run": {"type": "array", "items": {"type": "string", "format": "enum", "enum": sorted(KNOWN_AGENTS)}},
+        "parallelizable": {"type": "boolean"},
+    },
+    "required": ["intent_summary", "agents_to_run"],
+}
+_ROUTER_GEN_CFG = genai.types.GenerationConfig(
+    max_output_tokens=2000, response_mime_type="application/json", response_schema=_ROUTER_SCHEMA
+)
+
+# Splits the fused SafetyEvaluator reply into its verdict and score lines
+_FUSED_VERDICT_RE = re.compile(r"(Verdict:.*?)\n\s*(Score:.*)", re.S)
+
+_AGENTS_ARRAY_RE = re.compile(r'"agents_to_run"\s*:\s*(\[[^\]]*\])')
+_INTENT_RE = re.compile(r'"intent_summary"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+def _plan_from_partial(buf: str) -> Optional[Dict]:
+    """Builds a plan from a partially streamed router response once agents_to_run is closed."""
+    m = _AGENTS_ARRAY_RE.search(buf)
+    if not m:
+        return None
+    try:
+        agents = _loads(m.group(1))
+    except ValueError:
+        return None
+    intent = _INTENT_RE.search(buf)
+    return {
+        "intent_summary": _loads(intent.group(1)) if intent else "Task",
+        "agents_to_run": agents,
+        "parallelizable": False,
+    }
+
+# Markdown fences stripped from every LLM response in a single pass
+_FENCE_RE = re.compile(r"```(?:json|python)?")
+
+# ========== Response Cache ==========
+
+def _cache_path(model: str, system_prompt: str, input_context: str, max_tokens: int) -> str:
+    key = hashlib.sha256(f"{model}\0{max_tokens}\0{system_prompt}\0{input_context}".encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, key + ".json")
+
+def _cache_get(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "rb") as f:
+            return _loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def _cache_put(path: str, result: Dict):
+    # Write to a temp file and rename so concurrent readers never see a partial entry
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_dumps(result))
+        os.replace(tmp, path)
+    except OSError as e:
+        log.warning(f"Failed to write LLM cache entry: {e}")
+
+# Agents whose verdict depends only on the code, so identical code can reuse a previous result.
+# The Stage 3 evaluation shares the same LRU, keyed by its full request + code + tests context.
+CODE_ONLY_AGENTS = frozenset({"SafetyAgent", "DocstringAgent"})
+MAX_CODE_RESULTS = 256
+
+# (agent, blake2b(code)) -> result, in LRU order
+_CODE_RESULTS: "collections.OrderedDict[Tuple[str, bytes], Dict]" = collections.OrderedDict()
+_CODE_RESULTS_LOCK = threading.Lock()  # Streamlit sessions run their loops on different threads
+
+def _code_key(agent: str, code: str) -> Tuple[str, bytes]:
+    return agent, hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+
+def _code_result_get(key: Tuple[str, bytes]) -> Optional[Dict]:
+    with _CODE_RESULTS_LOCK:
+        result = _CODE_RESULTS.get(key)
+        if result is None:
+            return None
+        _CODE_RESULTS.move_to_end(key)
+    return dict(result)
+
+def _code_result_put(key: Tuple[str, bytes], result: Dict):
+    with _CODE_RESULTS_LOCK:
+        _CODE_RESULTS[key] = result
+        _CODE_RESULTS.move_to_end(key)
+        if len(_CODE_RESULTS) > MAX_CODE_RESULTS:
+            _CODE_RESULTS.popitem(last=False)
+
 # ========== Orchestrator ==========
 
+# Call key -> future of the identical LLM call already running, so concurrent duplicates
+# (e.g. two sessions on the same prompt) share one request. concurrent.futures rather than
+# asyncio futures because Streamlit sessions await from different threads' event loops.
+_IN_FLIGHT: Dict[bytes, concurrent.futures.Future] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+def _call_key(model: str, system_prompt: str, input_context: str, max_tokens: int) -> bytes:
+    return hashlib.blake2b(
+        "\0".join((model, system_prompt, input_context, str(max_tokens))).encode("utf-8"), digest_size=16
+    ).digest()
+
+# One pool for the whole process. asyncio.to_thread would use the loop's default
+# executor, which asyncio.run() tears down after every Streamlit step.
+_GLOBAL_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv("CODERLANG_MAX_WORKERS", "32")),
+    thread_name_prefix="coderlang-llm",
+)
+atexit.register(_GLOBAL_EXECUTOR.shutdown, wait=False)
+# Memoized code runs are only valid for the orchestrator's lifetime
+atexit.register(clear_run_cache)
+
+# Agents a plan can lose under load without failing the user's request
+OPTIONAL_AGENTS = frozenset({"ResearchAgent", "ExplainAgent", "DocstringAgent"})
+
+# Process-wide view of backend pressure; congested plans shed OPTIONAL_AGENTS
+_LOAD = LoadMonitor(
+    p95_threshold_s=float(os.getenv("ORCH_CONGESTED_P95_S", "30")),
+    max_in_flight=int(os.getenv("ORCH_CONGESTED_IN_FLIGHT", "48")),
+)
+
+# Shared by every Orchestrator and event loop so concurrent requests stay under the QPM quota
+_RATE_LIMITER = RateLimiter(RATE_LIMIT_QPM, 60.0)
+
+# Model name -> slots for in-flight calls. Unlike the per-loop semaphore this also bounds
+# concurrent sessions on other loops and speculative calls, which queue here instead of drawing 429s.
+_MODEL_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+
+def _model_slots(model: str) -> threading.BoundedSemaphore:
+    slots = _MODEL_SLOTS.get(model)
+    if slots is None:
+        slots = _MODEL_SLOTS.setdefault(model, threading.BoundedSemaphore(MAX_PER_MODEL))
+    return slots
+
+# Shared across Orchestrators so plans carry over between requests, and persisted across
+# restarts. Saved plans are dropped whenever the router prompt, agent set or embedder changes.
+PLAN_CACHE_PATH = os.path.join(CACHE_DIR, "plan_cache.json")
+_ROUTER_FINGERPRINT = hashlib.sha256(
+    "\0".join([SYSTEM_PROMPTS["TaskRouter"], *sorted(KNOWN_AGENTS), EMBED_MODEL]).encode("utf-8")
+).hexdigest()
+_PLAN_CACHE = PlanCache(
+    threshold=float(os.getenv("CODERLANG_PLAN_CACHE_THRESHOLD", "0.90")),
+    fingerprint=_ROUTER_FINGERPRINT,
+)
+if PLAN_CACHE_ENABLED:
+    _PLAN_CACHE.load(PLAN_CACHE_PATH)
+    atexit.register(_PLAN_CACHE.save, PLAN_CACHE_PATH)
+
+# Client configuration and models are shared with the agents through agents.model_pool;
+# only the per-(model, max_tokens) generation configs are cached here.
+_GEN_CFGS: Dict[Tuple[str, int], genai.types.GenerationConfig] = {}
+
 class OrchestratorSession:
     """
     Represents a single resumable execution session.
@@ -84,27 +382,35 @@ class OrchestratorSession:
     def __init__(self, orchestrator, prompt: str, state: Optional[Dict] = None):
         self.orch = orchestrator
         self.prompt = prompt
+        self._derivative_ctx: Optional[str] = None
+        # CodeGen started while the router was still deciding; a plain future so it outlives the step's loop
+        self._speculative_code: Optional[concurrent.futures.Future] = None
+        # Called with (agent, result) as each agent finishes; used by stream_plan and the Streamlit status panel
+        self.on_result: Optional[Callable[[str, Dict], None]] = None
         
         if state:
             self.state = state
+            # Restored state carries logs as a plain list
+            self.state["logs"] = collections.deque(self.state.get("logs", []), maxlen=MAX_SESSION_LOGS)
         else:
             self.state = {
-                "stage": "INIT",  # INIT -> PLANNED -> STAGE1 -> STAGE2 -> STAGE3 -> COMPLETE
+                "stage": "INIT",  # INIT -> PLANNED -> STAGE2 -> COMPLETE (STAGE1 only for resumed sessions)
                 "plan": {},
                 "results": {},
                 "start_time": time.time(),
-                "logs": []
+                "logs": collections.deque(maxlen=MAX_SESSION_LOGS)
             }
 
     def log(self, message: str):
-        entry = f"{time.strftime('%H:%M:%S')} - {message}"
+        # Elapsed seconds since the session started; start_time is wall-clock so it survives restores
+        entry = f"{time.time() - self.state['start_time']:7.3f}s - {message}"
         self.state["logs"].append(entry)
-        logging.info(f"[{self.state['stage']}] {message}")
+        log.info("[%s] %s", self.state["stage"], message)
 
     def to_json(self) -> Dict:
         return {
             "prompt": self.prompt,
-            "state": self.state
+            "state": {**self.state, "logs": list(self.state["logs"])}
         }
 
     async def run_next_step(self):
@@ -115,108 +421,227 @@ class OrchestratorSession:
         # --- STAGE 0: ROUTING ---
         if stage == "INIT":
             self.log("🧠 Routing Request...")
-            route_res = await self.orch.run_llm("Router", MODEL_FAST, SYSTEM_PROMPTS["TaskRouter"], self.prompt)
-            try:
-                plan = json.loads(route_res["text"])
-                # Normalize keys
-                if "agents_to_run" not in plan: plan["agents_to_run"] = ["GeneralAgent"]
-                if "parallelizable" not in plan: plan["parallelizable"] = False
-            except:
-                self.log("⚠️ Router failed JSON parse. Defaulting to GeneralChat.")
-                plan = {"intent_summary": "Fallback", "agents_to_run": ["GeneralAgent"], "parallelizable": False}
+            plan = quick_route(self.prompt)
+            if plan is not None:
+                self.log("⚡ Matched a known request shape, skipping LLM router.")
+            else:
+                vec = None
+                if PLAN_CACHE_ENABLED:
+                    plan = _PLAN_CACHE.get_exact(self.prompt)
+                    if plan is not None:
+                        self.log("♻️ Reusing cached plan for a repeated prompt.")
+                    else:
+                        vec = await asyncio.get_running_loop().run_in_executor(_GLOBAL_EXECUTOR, _PLAN_CACHE.embed, self.prompt)
+                        plan = _PLAN_CACHE.lookup(vec) if vec else None
+                        if plan is not None:
+                            self.log("♻️ Reusing cached plan for a similar prompt.")
+                if plan is None:
+                    if _ROUTER_CODE_RE.search(self.prompt) and not _LOAD.is_congested():
+                        # Prompts that mention code are almost always planned with CodeGen
+                        _, model, max_tokens, _ = AGENT_DAG["CodeGenAgent"]
+                        self._speculative_code = self.orch.submit_llm(model, SYSTEM_PROMPTS["CodeGenAgent"], self.prompt, max_tokens)
+                    try:
+                        plan = _validate_plan(await self.orch.run_router(self.prompt))
+                        if PLAN_CACHE_ENABLED:
+                            _PLAN_CACHE.add(vec, plan, text=self.prompt)
+                    except ValueError as e:
+                        self.log(f"⚠️ Router returned no usable plan ({e}). Defaulting to GeneralChat.")
+                        plan = {"intent_summary": "Fallback", "agents_to_run": ["GeneralAgent"], "parallelizable": False}
             
+            if _LOAD.is_congested():
+                kept = [a for a in plan["agents_to_run"] if a not in OPTIONAL_AGENTS]
+                if kept and len(kept) < len(plan["agents_to_run"]):
+                    self.log(f"🐢 Backend congested (p95 {_LOAD.p95():.1f}s), skipping optional agents.")
+                    plan = {**plan, "agents_to_run": kept}
+
+            if self._speculative_code is not None and "CodeGenAgent" not in plan["agents_to_run"]:
+                self._speculative_code.cancel()
+                self._speculative_code = None
+                self.log("🗑️ Router planned no code, discarding the speculative CodeGen.")
+
             self.state["plan"] = plan
             self.state["stage"] = "PLANNED"
             self.log(f"📋 Plan: {plan['agents_to_run']}")
             return
 
-        active_agents = self.state["plan"].get("agents_to_run", [])
+        # Built once per step; every membership check below is O(1)
+        active_agents = frozenset(self.state["plan"].get("agents_to_run", ()))
 
-        # --- STAGE 1: CREATION ---
+        # --- STAGE 1 + 2: CREATION AND DERIVATIVES ---
+        # Every agent is launched as soon as its dependencies in AGENT_DAG are met,
+        # so derivatives start the moment CodeGen finishes and never wait on Research/Explain.
         if stage == "PLANNED":
             self.log("🚀 Starting Stage 1 (Creation)...")
-            tasks = []
-            
-            if "ResearchAgent" in active_agents:
-                tasks.append(("ResearchAgent", self.orch.run_llm("Research", MODEL_FAST, SYSTEM_PROMPTS["ResearchAgent"], self.prompt)))
-            
-            if "GeneralAgent" in active_agents and "CodeGenAgent" not in active_agents:
-                tasks.append(("GeneralAgent", self.orch.run_llm("Chat", MODEL_FAST, SYSTEM_PROMPTS["GeneralAgent"], self.prompt)))
-                
-            if "CodeGenAgent" in active_agents:
-                tasks.append(("CodeGenAgent", self.orch.run_llm("CodeGen", MODEL_HEAVY, SYSTEM_PROMPTS["CodeGenAgent"], self.prompt, max_tokens=4000)))
-                
-            if "ExplainAgent" in active_agents:
-                tasks.append(("ExplainAgent", self.orch.run_llm("Explain", MODEL_FAST, SYSTEM_PROMPTS["ExplainAgent"], self.prompt)))
-
-            if tasks:
-                names = [t[0] for t in tasks]
-                coros = [t[1] for t in tasks]
-                results_s1 = await asyncio.gather(*coros)
-                for name, res in zip(names, results_s1):
-                    results[name] = res
-            
-            self.state["stage"] = "STAGE1"
-            self.log("✅ Stage 1 Complete.")
+            await self._run_dag(active_agents)
+            self.state["stage"] = "STAGE2"
+            self.log("✅ Stage 1 + 2 Complete.")
             return
 
-        # --- STAGE 2: DERIVATIVES ---
+        # --- STAGE 2: DERIVATIVES (sessions resumed after Stage 1) ---
         if stage == "STAGE1":
-            base_code = results.get("CodeGenAgent", {}).get("text", "")
-            if not base_code:
-                self.log("⏩ No code generated, skipping Stage 2.")
-                self.state["stage"] = "STAGE2"
-                return
-
-            self.log("⚡ Starting Stage 2 (Derivatives)...")
-            context_for_derivs = f"Original Request: {self.prompt}\n\nCode:\n{base_code}"
-            tasks = []
-
-            def make_task(agent_name, model=MODEL_FAST):
-                return (agent_name, self.orch.run_llm(agent_name, model, SYSTEM_PROMPTS[agent_name], context_for_derivs))
-
-            if "SafetyAgent" in active_agents: tasks.append(make_task("SafetyAgent"))
-            if "TestGenAgent" in active_agents: tasks.append(make_task("TestGenAgent"))
-            if "DocstringAgent" in active_agents: tasks.append(make_task("DocstringAgent"))
-            if "TranslateAgent" in active_agents: tasks.append(make_task("TranslateAgent"))
-
-            if tasks:
-                names = [t[0] for t in tasks]
-                coros = [t[1] for t in tasks]
-                results_s2 = await asyncio.gather(*coros)
-                for name, res in zip(names, results_s2):
-                    results[name] = res
-
-            # Update base code if docstrings were added
-            if results.get("DocstringAgent", {}).get("ok"):
-                # We store the docstring version as the 'final' code in a separate key or just overwrite
-                # For simplicity, let's overwrite the display code in summary later, but keep raw result here
-                pass
-
+            await self._run_dag(active_agents)
             self.state["stage"] = "STAGE2"
             self.log("✅ Stage 2 Complete.")
             return
 
-        # --- STAGE 3: EVALUATION ---
+        # --- STAGE 3: EVALUATION (fallback) ---
         if stage == "STAGE2":
-            base_code = results.get("DocstringAgent", {}).get("text") or results.get("CodeGenAgent", {}).get("text", "")
+            base_code = self._final_code()
             
-            if "EvaluatorAgent" in active_agents and base_code:
+            # Normally produced inside the DAG; this covers resumed sessions and a failed fused check
+            if "EvaluatorAgent" in active_agents and base_code and "EvaluatorAgent" not in results:
                 self.log("⚖️ Starting Stage 3 (Evaluation)...")
-                eval_ctx = f"Req: {self.prompt}\nCode: {base_code}\nTests: {results.get('TestGenAgent', {}).get('text','')}"
-                results["EvaluatorAgent"] = await self.orch.run_llm("Evaluator", MODEL_FAST, SYSTEM_PROMPTS["EvaluatorAgent"], eval_ctx)
+                self._record("EvaluatorAgent", await self._run_evaluation())
             
             self.state["stage"] = "COMPLETE"
             self.log("✅ Workflow Complete.")
             return
 
+    async def _run_dag(self, active_agents: FrozenSet[str]):
+        """Dispatches the planned agents in dependency order, running every ready agent concurrently."""
+        results = self.state["results"]
+        pending = [a for a in AGENT_DAG if a in active_agents and a not in results]
+        # Chat is redundant when code is being generated
+        if "CodeGenAgent" in active_agents and "GeneralAgent" in pending:
+            pending.remove("GeneralAgent")
+        # The fused safety check produces the evaluation itself
+        if "EvaluatorAgent" in pending and self._can_fuse_evaluation():
+            pending.remove("EvaluatorAgent")
+        running: Dict[asyncio.Task, str] = {}
+
+        while pending or running:
+            ready = [a for a in pending if all(d in results or d not in active_agents for d in AGENT_DAG[a][3])]
+            for name in ready:
+                pending.remove(name)
+                running[asyncio.create_task(self._run_agent(name))] = name
+            if not running:
+                # Remaining agents depend on something that was not planned or produced nothing
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                res = task.result()
+                if res is not None:
+                    self._record(name, res)
+
+    async def _run_agent(self, name: str) -> Optional[Dict]:
+        """Runs one DAG node; returns None when its upstream produced no code."""
+        task_name, model, max_tokens, deps = AGENT_DAG[name]
+        if not deps:
+            if name == "CodeGenAgent" and self._speculative_code is not None:
+                res = await asyncio.wrap_future(self._speculative_code)
+                self._speculative_code = None
+            else:
+                res = await self.orch.run_llm(task_name, model, SYSTEM_PROMPTS[name], self.prompt, max_tokens=max_tokens)
+            if name == "CodeGenAgent":
+                self.log("✅ Code generated.")
+            return res
+
+        context = self._derivative_context()
+        if not context:
+            self.log(f"⏩ No code generated, skipping {name}.")
+            return None
+
+        if name == "EvaluatorAgent":
+            self.log("⚖️ Starting Evaluation...")
+            return await self._run_evaluation()
+
+        if name == "SafetyAgent":
+            static = self._static_safety_verdict()
+            if static is not None:
+                if self._can_fuse_evaluation():
+                    # The evaluator was left out of the DAG for the fused call; run it here instead
+                    self._record("EvaluatorAgent", await self._run_evaluation())
+                return static
+
+        if name == "SafetyAgent" and self._can_fuse_evaluation():
+            fused = await self._run_safety_with_evaluation(context, model, max_tokens)
+            if fused is not None:
+                return fused
+
+        if name in CODE_ONLY_AGENTS:
+            base_code = self.state["results"]["CodeGenAgent"]["text"]
+            key = _code_key(name, base_code)
+            cached = _code_result_get(key)
+            if cached is not None:
+                self.log(f"♻️ {name} reused the result for identical code.")
+                return cached
+            res = await self.orch.run_llm(task_name, model, SYSTEM_PROMPTS[name], base_code, max_tokens=max_tokens)
+            if res.get("ok"):
+                _code_result_put(key, res)
+            return res
+        return await self.orch.run_llm(task_name, model, SYSTEM_PROMPTS[name], context, max_tokens=max_tokens)
+
+    def _record(self, name: str, result: Dict):
+        self.state["results"][name] = result
+        if self.on_result is not None:
+            self.on_result(name, result)
+
+    def _static_safety_verdict(self) -> Optional[Dict]:
+        """A SAFE verdict when the AST screen finds nothing risky; None if the LLM scan is needed."""
+        findings = find_risky_constructs(self.state["results"]["CodeGenAgent"]["text"])
+        if findings is None or findings:
+            return None
+        self.log("🛡️ Static check found nothing risky, skipping the LLM safety scan.")
+        return {
+            "text": "Verdict: SAFE (static screen only). No flagged imports, builtins, dunder access, "
+                    "endless loops or huge exponents were found; the code was not reviewed by the LLM.",
+            "ok": True,
+        }
+
+    async def _run_evaluation(self) -> Dict:
+        """Judges the final code and tests, reusing the verdict for an identical request/code/tests."""
+        results = self.state["results"]
+        eval_ctx = f"Req: {self.prompt}\nCode: {self._final_code()}\nTests: {results.get('TestGenAgent', {}).get('text','')}"
+        # The context holds the request, code and tests, so it is the whole verdict key
+        key = _code_key("EvaluatorAgent", eval_ctx)
+        cached = _code_result_get(key)
+        if cached is not None:
+            self.log("♻️ Reusing the evaluation of an identical request and code.")
+            return cached
+        task_name, model, max_tokens, _ = AGENT_DAG["EvaluatorAgent"]
+        res = await self.orch.run_llm(task_name, model, SYSTEM_PROMPTS["EvaluatorAgent"], eval_ctx, max_tokens=max_tokens)
+        if res.get("ok"):
+            _code_result_put(key, res)
+        return res
+
+    def _can_fuse_evaluation(self) -> bool:
+        """The judge only needs the request and the raw code when no tests or docs are planned."""
+        agents = self.state["plan"].get("agents_to_run", ())
+        return "EvaluatorAgent" in agents and "TestGenAgent" not in agents and "DocstringAgent" not in agents
+
+    async def _run_safety_with_evaluation(self, context: str, model: str, max_tokens: int) -> Optional[Dict]:
+        """
+        One LLM call that returns both the safety verdict and the evaluation, stored as the
+        EvaluatorAgent result. Returns None if the reply cannot be split, so both run separately.
+        """
+        res = await self.orch.run_llm("SafetyEvaluator", model, SYSTEM_PROMPTS["SafetyEvaluator"], context, max_tokens=max_tokens)
+        m = _FUSED_VERDICT_RE.search(res.get("text", "")) if res.get("ok") else None
+        if not m:
+            self.log("⚠️ Fused safety/evaluation reply unparseable, running them separately.")
+            return None
+        self._record("EvaluatorAgent", {"text": m.group(2).strip(), "ok": True})
+        self.log("⚖️ Evaluation fused into the safety check.")
+        return {"text": m.group(1).strip(), "ok": True}
+
+    def _derivative_context(self) -> str:
+        """Input shared by every CodeGen consumer, built once; empty if no code was generated."""
+        if self._derivative_ctx is None:
+            base_code = self.state["results"].get("CodeGenAgent", {}).get("text", "")
+            self._derivative_ctx = f"Original Request: {self.prompt}\n\nCode:\n{base_code}" if base_code.strip() else ""
+        return self._derivative_ctx
+
+    def _final_code(self) -> str:
+        """Docstring-annotated code if available, otherwise the raw CodeGen output."""
+        results = self.state["results"]
+        return results.get("DocstringAgent", {}).get("text") or results.get("CodeGenAgent", {}).get("text", "")
+
     def get_summary(self) -> Dict:
         """Generates the summary object expected by the UI."""
         results = self.state["results"]
         plan = self.state["plan"]
         
-        # Determine final code (Docstring > CodeGen)
-        base_code = results.get("DocstringAgent", {}).get("text") or results.get("CodeGenAgent", {}).get("text", "")
+        base_code = self._final_code()
         
         latency = time.time() - self.state["start_time"]
         
@@ -230,37 +655,164 @@ class OrchestratorSession:
             "evaluation": results.get("EvaluatorAgent", {}).get("text"),
             "latency": f"{latency:.2f}s",
             "stage": self.state["stage"],
-            "logs": self.state["logs"]
+            "logs": list(self.state["logs"])
         }
 
 
 class Orchestrator:
-    def __init__(self, max_workers: int = 10):
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    def __init__(self, max_workers: int = MAX_PARALLEL_LLM):
+        self.max_workers = max_workers
+        # One semaphore per event loop: a shared Orchestrator serves Streamlit sessions on several threads
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        try:
+            ensure_configured()
+        except ValueError:
+            # Still usable without a key: each LLM call reports the failure as ok=False
+            log.warning("GOOGLE_API_KEY not set; LLM calls will fail.")
+
+    def _get_model(self, name: str, system_prompt: str) -> genai.GenerativeModel:
+        """
+        Returns the shared GenerativeModel per (model, system prompt). The static prompt goes in
+        system_instruction so every request shares a byte-identical prefix for Gemini's prompt cache.
+        """
+        return model_pool.get_model(name, safety_settings=SAFETY_SETTINGS, system_instruction=system_prompt)
+
+    def _get_cfg(self, model: str, max_tokens: int) -> genai.types.GenerationConfig:
+        """Returns a cached GenerationConfig for this model/token-limit pair."""
+        key = (model, max_tokens)
+        cfg = _GEN_CFGS.get(key)
+        if cfg is None:
+            cfg = _GEN_CFGS.setdefault(key, genai.types.GenerationConfig(max_output_tokens=max_tokens))
+        return cfg
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Concurrency cap for LLM calls, created lazily for the running loop (Streamlit runs a new loop per step)."""
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(self.max_workers)
+        return sem
+
+    def _call_blocking(self, model: str, system_prompt: str, input_context: str, max_tokens: int) -> Dict:
+        """One blocking LLM call with disk cache, rate limit and latency tracking; never raises."""
+        cache_path = _cache_path(model, system_prompt, input_context, max_tokens) if CACHE_ENABLED else None
+        if cache_path:
+            cached = _cache_get(cache_path)
+            if cached is not None:
+                return cached
+
+        m = self._get_model(model, system_prompt)
+        # Only the dynamic context is sent as content; the static prompt lives in system_instruction
+        _RATE_LIMITER.acquire()
+        try:
+            with _model_slots(model):
+                started = time.monotonic()
+                res = m.generate_content(input_context, generation_config=self._get_cfg(model, max_tokens))
+                _LOAD.record(time.monotonic() - started)
+            text = res.text
+            if "```" in text: 
+                text = _FENCE_RE.sub("", text).strip()
+            result = {"text": text, "ok": True}
+        except Exception as e:
+            return {"text": "", "error": str(e), "ok": False}
+
+        if cache_path:
+            _cache_put(cache_path, result)
+        return result
+
+    def submit_llm(self, model: str, system_prompt: str, input_context: str, max_tokens: int = 2000) -> concurrent.futures.Future:
+        """
+        Starts an LLM call on the shared executor without awaiting it, for speculative work that
+        must survive the current event loop. Not bounded by the per-loop semaphore.
+        """
+        def _tracked():
+            _LOAD.enter()
+            try:
+                return self._call_blocking(model, system_prompt, input_context, max_tokens)
+            finally:
+                _LOAD.exit()
+        return _GLOBAL_EXECUTOR.submit(_tracked)
 
     async def run_llm(self, task_name: str, model: str, system_prompt: str, input_context: str, max_tokens: int = 2000) -> Dict:
         """Universal Async LLM Caller"""
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        genai.configure(api_key=api_key)
-
-        def _blocking_call():
-            m = genai.GenerativeModel(model_name=model, safety_settings=SAFETY_SETTINGS)
-            full_prompt = f"{system_prompt}\n\n[Context]:\n{input_context}"
+        if not input_context or not input_context.strip():
+            return {"text": "", "ok": False, "error": "empty_context"}
+
+        key = _call_key(model, system_prompt, input_context, max_tokens)
+        with _IN_FLIGHT_LOCK:
+            shared = _IN_FLIGHT.get(key)
+            leader = shared is None
+            if leader:
+                shared = _IN_FLIGHT[key] = concurrent.futures.Future()
+        if not leader:
+            log.info("%s joined an identical in-flight call.", task_name)
+            return dict(await asyncio.wrap_future(shared))
+
+        result = {"text": "", "ok": False, "error": "cancelled"}
+        _LOAD.enter()
+        try:
+            async with self._semaphore():
+                result = await asyncio.get_running_loop().run_in_executor(
+                    _GLOBAL_EXECUTOR, self._call_blocking, model, system_prompt, input_context, max_tokens
+                )
+            return result
+        finally:
+            _LOAD.exit()
+            with _IN_FLIGHT_LOCK:
+                del _IN_FLIGHT[key]
+            shared.set_result(result)
+
+    async def run_router(self, prompt: str) -> Dict:
+        """
+        Streams the router response and returns the plan as soon as agents_to_run is complete,
+        without waiting for the trailing fields. Raises ValueError if no plan can be parsed.
+        """
+        def _blocking_route():
+            m = self._get_model(MODEL_FAST, SYSTEM_PROMPTS["TaskRouter"])
+            buf = ""
+            _RATE_LIMITER.acquire()
             try:
-                res = m.generate_content(full_prompt)
-                text = res.text
-                if "```" in text: 
-                    text = text.replace("```json", "").replace("```python", "").replace("```", "").strip()
-                return {"text": text, "ok": True}
+                with _model_slots(MODEL_FAST):
+                    for chunk in m.generate_content(prompt, stream=True, generation_config=_ROUTER_GEN_CFG):
+                        buf += chunk.text
+                        plan = _plan_from_partial(buf)
+                        if plan is not None:
+                            return plan
             except Exception as e:
-                return {"text": "", "error": str(e), "ok": False}
+                raise ValueError(f"router call failed: {e}") from e
+            return _parse_plan(buf)
 
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(self.executor, _blocking_call)
+        async with self._semaphore():
+            return await asyncio.get_running_loop().run_in_executor(_GLOBAL_EXECUTOR, _blocking_route)
 
     def create_session(self, prompt: str, state: Optional[Dict] = None) -> OrchestratorSession:
         return OrchestratorSession(self, prompt, state)
 
+    async def stream_plan(self, user_prompt: str) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Runs a plan like run_plan, but yields (agent, result) as each agent finishes so a caller
+        can render the code before slower agents are done, then ("summary", summary) at the end.
+        """
+        session = self.create_session(user_prompt)
+        queue: asyncio.Queue = asyncio.Queue()
+        session.on_result = lambda name, res: queue.put_nowait((name, res))
+
+        async def _drive():
+            try:
+                while session.state["stage"] != "COMPLETE":
+                    await session.run_next_step()
+            finally:
+                queue.put_nowait(None)
+
+        driver = asyncio.create_task(_drive())
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            await driver  # re-raises a failed step
+            yield "summary", session.get_summary()
+        finally:
+            driver.cancel()
+
     # Legacy wrapper for backward compatibility if needed
     async def run_plan(self, user_prompt: str) -> Dict[str, Any]:
         session = self.create_session(user_prompt)
@@ -1,45 +1,11 @@
-import google.generativeai as genai
-import os
 import logging
+from config import SAFETY_SETTINGS
+from agents.model_pool import ensure_configured, model_pool
 
 log = logging.getLogger(__name__)
 
-# Initialize the model once when the module is imported
-try:
-    api_key = os.environ.get("GOOGLE_API_KEY")
-    if not api_key:
-        log.error("GOOGLE_API_KEY not found.")
-        raise ValueError("GOOGLE_API_KEY not found.")
-    
-    genai.configure(api_key=api_key)
-    
-    model = genai.GenerativeModel(
-        model_name='gemini-2.5-pro',
-        safety_settings=[
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-        ]
-    )
-    log.info("Model configured (gemini-2.5-pro).")
-
-except Exception as e:
-    log.critical(f"FAILED TO INITIALIZE MODEL: {e}")
-    model = None
-
-def evaluate_code(prompt: str, code_string: str, explanation: str = "", tests: str = "") -> str:
-    """
-    Runs the Judge/Evaluator agent.
-    Now accepts explanation and tests to give a fair score.
-    """
-    if model is None:
-        log.error("Evaluator model not initialized.")
-        return "Evaluator model not initialized."
-        
-    log.info("Received request to evaluate code.")
-    
-    system_instructions = f"""
+# Static judge instructions, set once as the model's system_instruction
+SYSTEM_INSTRUCTIONS = """
     You are a CoderLang Judge/Evaluator Agent.
     Your purpose is to evaluate if the system fulfilled the user's request.
     
@@ -59,8 +25,22 @@ def evaluate_code(prompt: str, code_string: str, explanation: str = "", tests: s
     Score: [Your Score]/10
     Justification: [Your Justification]
     """
-    
-    user_message = f"""
+
+def _get_model():
+    """Returns the pooled evaluator model, configuring genai on first use; None if that fails."""
+    try:
+        ensure_configured()
+        return model_pool.get_model(
+            model_name='gemini-2.5-pro',
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTIONS
+        )
+    except Exception as e:
+        log.critical(f"FAILED TO INITIALIZE MODEL: {e}")
+        return None
+
+def _build_user_message(prompt: str, code_string: str, explanation: str, tests: str) -> str:
+    return f"""
     ---
     User Request:
     {prompt}
@@ -75,18 +55,24 @@ def evaluate_code(prompt: str, code_string: str, explanation: str = "", tests: s
     {tests if tests else "None provided"}
     ---
     """
-    
-    messages = [
-        {'role': 'user', 'parts': [system_instructions]},
-        {'role': 'model', 'parts': ["OK. I am ready to evaluate the entire output."]},
-        {'role': 'user', 'parts': [user_message]}
-    ]
+
+def evaluate_code(prompt: str, code_string: str, explanation: str = "", tests: str = "") -> str:
+    """
+    Runs the Judge/Evaluator agent.
+    Now accepts explanation and tests to give a fair score.
+    """
+    model = _get_model()
+    if model is None:
+        log.error("Evaluator model not initialized.")
+        return "Evaluator model not initialized."
+        
+    log.info("Received request to evaluate code.")
     
     try:
-        response = model.generate_content(messages)
+        response = model.generate_content(_build_user_message(prompt, code_string, explanation, tests))
         evaluation = response.text.strip()
         log.info("Evaluation successful.")
         return evaluation
     except Exception as e:
         log.error(f"Evaluation failed! Error: {e}")
-        return f"An error occurred: {e}"
\ No newline at end of file
+        return f"An error occurred: {e}"
@@ -0,0 +1,40 @@
+import collections
+import threading
+
+class LoadMonitor:
+    """
+    Tracks LLM backend pressure from this process's own calls: how many are queued or
+    running, and the p95 latency over a rolling window of recent completions.
+    """
+    def __init__(self, window: int = 100, p95_threshold_s: float = 30.0, max_in_flight: int = 48, min_samples: int = 20):
+        self.p95_threshold_s = p95_threshold_s
+        self.max_in_flight = max_in_flight
+        self.min_samples = min_samples
+        self._latencies = collections.deque(maxlen=window)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def exit(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def record(self, latency_s: float):
+        with self._lock:
+            self._latencies.append(latency_s)
+
+    def p95(self) -> float:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def is_congested(self) -> bool:
+        with self._lock:
+            in_flight = self._in_flight
+            enough_samples = len(self._latencies) >= self.min_samples
+        return in_flight > self.max_in_flight or (enough_samples and self.p95() > self.p95_threshold_s)
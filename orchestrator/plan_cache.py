@@ -0,0 +1,115 @@
+import collections
+import copy
+import hashlib
+import json
+import logging
+import math
+import operator
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+
+log = logging.getLogger(__name__)
+
+EMBED_MODEL = "models/text-embedding-004"
+DEFAULT_THRESHOLD = 0.90
+MAX_ENTRIES = 512
+
+_WS_RE = re.compile(r"\s+")
+
+def prompt_key(text: str) -> str:
+    """Hash of the prompt with case and whitespace normalised, for the exact-match tier."""
+    return hashlib.blake2b(_WS_RE.sub(" ", text.strip()).casefold().encode("utf-8"), digest_size=16).hexdigest()
+
+class PlanCache:
+    """
+    Reuses router plans for prompts whose embeddings are near-duplicates of a
+    previously routed prompt, skipping the router LLM round-trip on a hit.
+    Vectors are stored unit-normalised so cosine similarity is a plain dot product.
+    Plans are also indexed by an exact prompt hash, so a repeated prompt skips the
+    embedding call as well.
+    `fingerprint` identifies the router configuration; a saved cache with a different
+    fingerprint is discarded on load.
+    """
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = MAX_ENTRIES, fingerprint: str = ""):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.fingerprint = fingerprint
+        self._entries: List[Tuple[List[float], Dict]] = []
+        self._exact: "collections.OrderedDict[str, Dict]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_exact(self, text: str) -> Optional[Dict]:
+        """Returns a copy of the plan stored for this exact (normalised) prompt."""
+        key = prompt_key(text)
+        with self._lock:
+            plan = self._exact.get(key)
+            if plan is None:
+                return None
+            self._exact.move_to_end(key)
+        return copy.deepcopy(plan)
+
+    def embed(self, text: str) -> Optional[List[float]]:
+        """Returns the unit embedding for text, or None if the embedding call fails."""
+        try:
+            vec = genai.embed_content(model=EMBED_MODEL, content=text, task_type="semantic_similarity")["embedding"]
+        except Exception as e:
+            log.warning(f"Plan cache embedding failed: {e}")
+            return None
+        norm = math.sqrt(sum(x * x for x in vec))
+        return [x / norm for x in vec] if norm else None
+
+    def lookup(self, vec: List[float]) -> Optional[Dict]:
+        """Returns a copy of the closest cached plan at or above the threshold."""
+        with self._lock:
+            entries = list(self._entries)
+        best, best_sim = None, self.threshold
+        for cached_vec, plan in entries:
+            sim = sum(map(operator.mul, vec, cached_vec))
+            if sim >= best_sim:
+                best, best_sim = plan, sim
+        return copy.deepcopy(best) if best is not None else None
+
+    def add(self, vec: Optional[List[float]], plan: Dict, text: Optional[str] = None):
+        """Stores a plan under its embedding and, if text is given, under the exact prompt hash."""
+        plan = copy.deepcopy(plan)
+        with self._lock:
+            if vec:
+                self._entries.append((vec, plan))
+                if len(self._entries) > self.max_entries:
+                    del self._entries[0]
+            if text is not None:
+                key = prompt_key(text)
+                self._exact[key] = plan
+                self._exact.move_to_end(key)
+                if len(self._exact) > self.max_entries:
+                    self._exact.popitem(last=False)
+
+    def load(self, path: str):
+        """Restores entries saved by a process with the same fingerprint."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("fingerprint") != self.fingerprint:
+            log.info("Plan cache at %s was built for a different router; ignoring it.", path)
+            return
+        with self._lock:
+            self._entries = [(vec, plan) for vec, plan in data.get("entries", [])][-self.max_entries:]
+            self._exact = collections.OrderedDict(list(data.get("exact", {}).items())[-self.max_entries:])
+
+    def save(self, path: str):
+        with self._lock:
+            data = {"fingerprint": self.fingerprint, "entries": list(self._entries), "exact": dict(self._exact)}
+        # Write to a temp file and rename so a crash never leaves a truncated cache
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning(f"Failed to save plan cache: {e}")
@@ -0,0 +1,27 @@
+import threading
+import time
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing `rate` calls per `period` seconds, with bursts up to `rate`.
+    Blocking by design: it is acquired inside executor threads, so it is shared by every
+    event loop in the process.
+    """
+    def __init__(self, rate: int, period: float = 60.0):
+        self.capacity = float(rate)
+        self.fill_rate = rate / period
+        self._tokens = float(rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.fill_rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.fill_rate
+            time.sleep(wait)
@@ -1,6 +1,7 @@
 import logging
 import asyncio
-import sys
+import threading
+from typing import Callable, Dict, Optional
 
 # Try to import nest_asyncio for Streamlit/Jupyter compatibility
 try:
@@ -12,15 +13,45 @@ from orchestrator.coordinator import Orchestrator
 
 log = logging.getLogger(__name__)
 
-def run_orchestrator(user_prompt: str):
+# Shared by every request; models, caches and limits already live at process scope
+_orchestrator = None
+_orchestrator_lock = threading.Lock()
+
+def get_orchestrator() -> Orchestrator:
+    """Returns the process-wide Orchestrator, creating it on first use."""
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = Orchestrator()
+    return _orchestrator
+
+async def _stream_to(orchestrator: Orchestrator, user_prompt: str, on_result: Callable[[str, Dict], None]):
+    """Runs the plan via stream_plan, handing each agent result to on_result as it finishes."""
+    raw_results = {}
+    summary = {}
+    async for name, result in orchestrator.stream_plan(user_prompt):
+        if name == "summary":
+            summary = result
+        else:
+            raw_results[name] = result
+            on_result(name, result)
+    return {"summary": summary, "raw_results": raw_results}
+
+def run_orchestrator(user_prompt: str, on_result: Optional[Callable[[str, Dict], None]] = None):
     """
     Synchronous Entry Point for the Async Orchestrator.
     This function is called by main.py and app.py.
+    If on_result is given, it is called with (agent, result) as each agent finishes.
     """
     log.info(f"Router received: {user_prompt[:50]}...")
     
     try:
-        orchestrator = Orchestrator()
+        orchestrator = get_orchestrator()
+        if on_result is None:
+            run = lambda: orchestrator.run_plan(user_prompt)
+        else:
+            run = lambda: _stream_to(orchestrator, user_prompt, on_result)
         
         # 1. Check for an existing event loop (common in Streamlit/Jupyter)
         try:
@@ -33,14 +64,14 @@ def run_orchestrator(user_prompt: str):
             if nest_asyncio:
                 # Patch the loop to allow nested execution
                 nest_asyncio.apply()
-                return loop.run_until_complete(orchestrator.run_plan(user_prompt))
+                return loop.run_until_complete(run())
             else:
                 log.warning("⚠️ nest_asyncio not found! Streamlit execution might fail.")
                 # Attempt execution anyway (might work in some Python versions)
-                return loop.run_until_complete(orchestrator.run_plan(user_prompt))
+                return loop.run_until_complete(run())
         else:
             # We are in a standard script (CLI / main.py)
-            return asyncio.run(orchestrator.run_plan(user_prompt))
+            return asyncio.run(run())
 
     except Exception as e:
         log.critical(f"Orchestrator Bridge Failed: {e}")
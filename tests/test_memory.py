@@ -1,23 +1,12 @@
 import pytest
 import os
 import json
-import shutil
 from memory.memory_store import MemoryStore
 
-TEST_MEM_DIR = "test_memory"
-
 @pytest.fixture
-def memory_store():
-    # Setup
-    if os.path.exists(TEST_MEM_DIR):
-        shutil.rmtree(TEST_MEM_DIR)
-    
-    store = MemoryStore(memory_dir=TEST_MEM_DIR)
-    yield store
-    
-    # Teardown
-    if os.path.exists(TEST_MEM_DIR):
-        shutil.rmtree(TEST_MEM_DIR)
+def memory_store(tmp_path):
+    # pytest creates and purges tmp_path, so no manual setup/teardown is needed
+    return MemoryStore(memory_dir=str(tmp_path))
 
 def test_short_term_memory(memory_store):
     """Tests putting and getting short term memory."""
@@ -36,6 +25,15 @@ def test_persistence(memory_store):
     memory_store.put("persisted_key", "value123")
     
     # Manually check file
-    with open(os.path.join(TEST_MEM_DIR, "short_term.json"), 'r') as f:
+    with open(os.path.join(memory_store.memory_dir, "short_term.json"), 'r') as f:
         data = json.load(f)
-        assert data["persisted_key"] == "value123"
\ No newline at end of file
+        assert data["persisted_key"] == "value123"
+
+def test_context_refreshes_after_put(memory_store):
+    """Tests that the memoized context is rebuilt after a write."""
+    memory_store.put("user_goal", "build website")
+    assert "build website" in memory_store.get_all_context()
+    memory_store.put("user_goal", "build api")
+    context = memory_store.get_all_context()
+    assert "build api" in context
+    assert "build website" not in context
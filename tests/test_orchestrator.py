@@ -0,0 +1,95 @@
+import pytest
+import os
+
+# Set a dummy API key to pass initialization checks
+os.environ.setdefault("GOOGLE_API_KEY", "DUMMY_KEY")
+
+from orchestrator.coordinator import quick_route, _parse_plan, _validate_plan
+
+@pytest.mark.parametrize("prompt, agents", [
+    ("hello!", ["GeneralAgent"]),
+    ("Write a Python function to reverse a string", ["CodeGenAgent", "SafetyAgent", "EvaluatorAgent"]),
+    ("Create a class for a bank account", ["CodeGenAgent", "SafetyAgent", "EvaluatorAgent"]),
+    ("Write unit tests for a stack class", ["CodeGenAgent", "TestGenAgent", "SafetyAgent", "EvaluatorAgent"]),
+    ("Translate this function to Rust", ["CodeGenAgent", "TranslateAgent", "SafetyAgent", "EvaluatorAgent"]),
+    ("Explain this code: x = [i * i for i in range(10)]", ["ExplainAgent"]),
+])
+def test_quick_route_fixed_shapes(prompt, agents):
+    """Tests that single-intent prompts get the plan the router would produce."""
+    assert quick_route(prompt)["agents_to_run"] == agents
+
+@pytest.mark.parametrize("prompt", [
+    "Write a Python function to reverse a string and explain how it works",
+    "Write a function to parse CSV and add docstrings",
+    "Write me a poem about a class of students",
+])
+def test_quick_route_defers_compound_and_non_code_prompts(prompt):
+    """Tests that compound or ambiguous prompts are left to the LLM router."""
+    assert quick_route(prompt) is None
+
+@pytest.mark.parametrize("prompt", ["Translate hello world to Spanish", "explain"])
+def test_quick_route_sends_non_code_chat_to_general(prompt):
+    """Tests that prompts without code never reach the code agents."""
+    assert quick_route(prompt)["agents_to_run"] == ["GeneralAgent"]
+
+def test_parse_plan_ignores_fences_and_trailing_text():
+    """Tests that the first JSON object is decoded out of a chatty router reply."""
+    text = '```json\n{"intent_summary": "Code", "agents_to_run": ["CodeGenAgent"]}\n```\nDone.'
+    assert _parse_plan(text)["agents_to_run"] == ["CodeGenAgent"]
+
+def test_parse_plan_salvages_agents_from_malformed_json():
+    """Tests that a plan survives a malformed object as long as agents_to_run is intact."""
+    text = '{"intent_summary": "Explain", "agents_to_run": ["ExplainAgent"], "parallelizable": tru'
+    plan = _parse_plan(text)
+    assert plan["agents_to_run"] == ["ExplainAgent"]
+    assert plan["intent_summary"] == "Explain"
+
+def test_parse_plan_rejects_text_without_plan():
+    """Tests that a reply with no JSON at all raises ValueError."""
+    with pytest.raises(ValueError):
+        _parse_plan("I could not decide.")
+
+def test_validate_plan_drops_unknown_and_adds_companions():
+    """Tests that unknown/duplicate agents are dropped and CodeGen gets Safety and Evaluator."""
+    plan = _validate_plan({"agents_to_run": ["CodeGenAgent", "MadeUpAgent", "CodeGenAgent"]})
+    assert plan["agents_to_run"] == ["CodeGenAgent", "SafetyAgent", "EvaluatorAgent"]
+    assert plan["parallelizable"] is False
+
+@pytest.mark.parametrize("plan", [[], {"agents_to_run": "CodeGenAgent"}, {"agents_to_run": ["MadeUpAgent"]}])
+def test_validate_plan_rejects_unusable_plans(plan):
+    """Tests that plans with no usable agent list raise ValueError."""
+    with pytest.raises(ValueError):
+        _validate_plan(plan)
+
+def test_run_orchestrator_streams_agent_results(monkeypatch):
+    """Tests that on_result sees each agent as it finishes and the final dict matches run_plan's shape."""
+    from orchestrator.coordinator import OrchestratorSession
+    from orchestrator.router import run_orchestrator
+
+    async def fake_step(self):
+        self._record("CodeGenAgent", {"text": "print(1)", "ok": True})
+        self._record("ExplainAgent", {"text": "Prints 1.", "ok": True})
+        self.state["stage"] = "COMPLETE"
+    monkeypatch.setattr(OrchestratorSession, "run_next_step", fake_step)
+
+    seen = []
+    out = run_orchestrator("Write a function", on_result=lambda name, res: seen.append(name))
+    assert seen == ["CodeGenAgent", "ExplainAgent"]
+    assert out["raw_results"]["CodeGenAgent"]["text"] == "print(1)"
+    assert out["summary"]["generated_code"] == "print(1)"
+
+def test_orchestrator_builds_without_api_key(monkeypatch):
+    """Tests that a missing key only warns at construction and fails per call instead."""
+    import asyncio
+    from unittest.mock import MagicMock
+    import agents.model_pool as model_pool
+    from orchestrator.coordinator import Orchestrator
+
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(model_pool, "_configured", False)
+    orch = Orchestrator()
+    model = MagicMock()
+    model.generate_content.side_effect = RuntimeError("API key not valid")
+    monkeypatch.setattr(orch, "_get_model", lambda *a: model)
+    res = asyncio.run(orch.run_llm("Task", "m", "sys", "ctx-without-key", max_tokens=8))
+    assert res["ok"] is False
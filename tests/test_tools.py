@@ -1,22 +1,11 @@
 import pytest
-import os
-import shutil
 from tools.file_tool import FileTool
-from tools.run_code import run_python_code
+from tools.run_code import run_python_code, clear_run_cache
+from tools.static_safety import find_risky_constructs
 
-TEST_DIR = "test_data"
-
-@pytest.fixture(scope="module")
-def setup_teardown():
-    if not os.path.exists(TEST_DIR):
-        os.makedirs(TEST_DIR)
-    yield
-    if os.path.exists(TEST_DIR):
-        shutil.rmtree(TEST_DIR)
-
-def test_file_tool_write_and_read(setup_teardown):
+def test_file_tool_write_and_read(tmp_path):
     """Tests writing to and reading from a file."""
-    filepath = os.path.join(TEST_DIR, "test_file.txt")
+    filepath = str(tmp_path / "test_file.txt")
     content = "Hello CoderLang"
     
     # Write
@@ -42,4 +31,88 @@ def test_run_code_error():
     result = run_python_code(code)
     
     assert result['return_code'] != 0
-    assert "ZeroDivisionError" in result['stderr']
\ No newline at end of file
+    assert "ZeroDivisionError" in result['stderr']
+
+def test_run_code_with_tests():
+    """Tests that test_code runs against the names defined by the code."""
+    code = "def add(a, b):\n    return a + b"
+    tests = "assert add(2, 3) == 5\nprint('tests passed')"
+    result = run_python_code(code, test_code=tests)
+    
+    assert result['return_code'] == 0
+    assert result['stdout'].strip() == "tests passed"
+
+def test_run_code_memoizes_only_on_request(tmp_path):
+    """Tests that runs are fresh by default and memoized only with memoize=True until the cache is cleared."""
+    # Appends a line to a file on every real execution, so re-runs are observable
+    counter = tmp_path / "runs.txt"
+    code = f"with open({str(counter)!r}, 'a') as f:\n    f.write('x')\nprint('done')"
+
+    run_python_code(code)
+    run_python_code(code)
+    assert counter.read_text() == "xx"
+
+    first = run_python_code(code, memoize=True)
+    assert run_python_code(code, memoize=True) == first
+    assert counter.read_text() == "xxx"
+
+    clear_run_cache()
+    run_python_code(code, memoize=True)
+    assert counter.read_text() == "xxxx"
+
+def test_run_code_never_reruns_after_fork_server_dies(tmp_path):
+    """Tests that code which kills the fork server is reported as failed, not run again in a subprocess."""
+    import tools.run_code as run_code
+    if not run_code._USE_FORK:
+        pytest.skip("fork server not available")
+    marker = tmp_path / "runs.txt"
+    code = f"import os, signal\nopen({str(marker)!r}, 'a').write('x')\nos.kill(os.getppid(), signal.SIGKILL)\n"
+    result = run_python_code(code)
+    assert result["return_code"] == 1
+    assert marker.read_text() == "x"
+
+def test_run_code_rejects_syntax_error():
+    """Tests that unparseable code fails with a SyntaxError."""
+    result = run_python_code("def broken(:\n    pass")
+    assert result['return_code'] == 1
+    assert "SyntaxError" in result['stderr']
+
+def test_static_safety_passes_plain_code():
+    """Tests that pure code with a bounded loop has no findings."""
+    code = "def fib(n):\n    while True:\n        break\n    return n\nprint(fib(3))"
+    assert find_risky_constructs(code) == []
+
+def test_static_safety_flags_risky_code():
+    """Tests that system access and dynamic execution are flagged, and unparseable code is left to the LLM."""
+    findings = find_risky_constructs("import subprocess\neval('1')")
+    assert "import subprocess" in findings
+    assert "call to eval()" in findings
+    assert find_risky_constructs("def broken(:") is None
+
+@pytest.mark.parametrize("code", [
+    'import sys\nsys.modules["os"].system("rm -rf ~")',
+    'import io\nio.open("/etc/passwd", "w").write("x")',
+    "x = 10**10**10",
+    "import itertools\nfor i in itertools.count(): pass",
+])
+def test_static_safety_flags_indirect_access_and_runaway_code(code):
+    """Tests that interpreter/file access through sys or io and unbounded work are not screened as safe."""
+    assert find_risky_constructs(code)
+
+def test_scrape_url_decodes_undeclared_charset_as_utf8(monkeypatch):
+    """Tests that text/html without a charset is read as UTF-8, not requests' ISO-8859-1 default."""
+    import requests
+    from tools.search_tool import SearchTool
+
+    class FakeResponse:
+        headers = {"Content-Type": "text/html"}
+        encoding = "ISO-8859-1"
+        class raw:
+            @staticmethod
+            def read(n, decode_content=False): return "<p>café – naïve</p>".encode("utf-8")
+        def __enter__(self): return self
+        def __exit__(self, *exc): return False
+        def raise_for_status(self): pass
+
+    monkeypatch.setattr(requests, "get", lambda *a, **kw: FakeResponse())
+    assert "café – naïve" in SearchTool.scrape_url("http://example.com")
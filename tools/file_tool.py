@@ -11,15 +11,14 @@ class FileTool:
         """
         log.info(f"Attempting to read file: {file_path}")
         try:
-            if not os.path.exists(file_path):
-                log.warning(f"File not found: {file_path}")
-                return f"Error: File {file_path} does not exist."
-            
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             log.info(f"Successfully read {len(content)} bytes from {file_path}")
             return content
+        except FileNotFoundError:
+            log.warning(f"File not found: {file_path}")
+            return f"Error: File {file_path} does not exist."
         except Exception as e:
             log.error(f"Failed to read file: {e}")
             return f"Error reading file: {e}"
@@ -31,11 +30,10 @@ class FileTool:
         """
         log.info(f"Attempting to write to file: {file_path}")
         try:
-            # Ensure the directory exists
+            # Ensure the directory exists; exist_ok avoids a separate existence check
             directory = os.path.dirname(file_path)
-            if directory and not os.path.exists(directory):
-                os.makedirs(directory)
-                log.info(f"Created directory: {directory}")
+            if directory:
+                os.makedirs(directory, exist_ok=True)
 
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
@@ -53,11 +51,10 @@ class FileTool:
         """
         log.info(f"Listing files in: {directory}")
         try:
-            if not os.path.exists(directory):
-                return f"Error: Directory {directory} does not exist."
-                
             files = os.listdir(directory)
             return "\n".join(files)
+        except FileNotFoundError:
+            return f"Error: Directory {directory} does not exist."
         except Exception as e:
             log.error(f"Failed to list files: {e}")
             return f"Error listing files: {e}"
\ No newline at end of file
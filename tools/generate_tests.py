@@ -5,8 +5,24 @@ import tempfile
 import json
 import re
 
+from tools.run_code import run_capped
+
 log = logging.getLogger(__name__)
 
+# Counts in pytest's final summary line, e.g. "2 passed, 1 failed, 3 errors in 0.12s"
+_SUMMARY_RE = re.compile(r'(\d+) (passed|failed|error|skipped)s?\b')
+
+def _summary_line(output: str) -> str:
+    """Returns the last line carrying pytest counts, walking back from the end without splitting the whole output."""
+    end = len(output)
+    while end > 0:
+        start = output.rfind("\n", 0, end) + 1
+        line = output[start:end]
+        if _SUMMARY_RE.search(line):
+            return line
+        end = start - 1
+    return ""
+
 class TestTool:
     """
     A specialized tool for managing and executing generated tests.
@@ -44,31 +60,33 @@ class TestTool:
             # Run pytest as a subprocess
             # -q: quiet
             # --tb=short: shorter traceback
-            cmd = ["pytest", "-q", "--tb=short", file_path]
+            # --no-header, -p no:cacheprovider: no session header, no .pytest_cache next to the tests
+            cmd = ["pytest", "-q", "--tb=short", "--no-header", "-p", "no:cacheprovider", file_path]
+            # Generated test files are throwaway, so don't leave __pycache__ behind either
+            env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
             
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=15
-            )
+            # Output is capped so a test stuck printing cannot exhaust memory
+            result, truncated = run_capped(cmd, timeout=15, env=env)
+            if truncated:
+                log.warning("Pytest output exceeded the cap; the run was stopped early.")
             
-            output = result.stdout + result.stderr
+            output = result.stdout + result.stderr if result.stderr else result.stdout
             
-            # Parse the output for summary (e.g., "2 passed, 1 failed")
+            # pytest writes the summary near the end of stdout; one pass collects every count
             passed = result.returncode == 0
-            
-            summary_match = re.search(r'([\d]+) passed', output)
-            pass_count = int(summary_match.group(1)) if summary_match else 0
-            
-            fail_match = re.search(r'([\d]+) failed', output)
-            fail_count = int(fail_match.group(1)) if fail_match else 0
+            counts = {kind: int(n) for n, kind in _SUMMARY_RE.findall(_summary_line(result.stdout))}
+            pass_count = counts.get("passed", 0)
+            fail_count = counts.get("failed", 0)
+            summary = f"Passed: {pass_count}, Failed: {fail_count}"
+            # Collection/fixture errors are not failures but still mean the tests did not pass
+            if counts.get("error"):
+                summary += f", Errors: {counts['error']}"
 
-            log.info(f"Pytest finished. Passed: {pass_count}, Failed: {fail_count}")
+            log.info(f"Pytest finished. {summary}")
 
             return {
                 "passed": passed,
-                "summary": f"Passed: {pass_count}, Failed: {fail_count}",
+                "summary": summary,
                 "output": output,
                 "return_code": result.returncode
             }
@@ -1,75 +1,372 @@
+import ast
+import atexit
 import subprocess
 import logging
 import tempfile
 import os
+import hashlib
+import json
+import select
+import selectors
+import struct
+import threading
+import time
+import traceback
+from collections import OrderedDict
 
 log = logging.getLogger(__name__)
 
-def run_python_code(code_string: str) -> dict:
+# Runs the code file, then (if given) the test file in the code's namespace, both as __main__,
+# the way `python file` would: the code's directory is sys.path[0] and tracebacks start at
+# the first frame of the user's files
+_RUNNER = r'''
+import os, runpy, sys, traceback
+
+def run_files(paths):
+    sys.argv = list(paths)
+    sys.path[0] = os.path.dirname(os.path.abspath(paths[0]))
+    try:
+        g = runpy.run_path(paths[0], run_name="__main__")
+        if len(paths) > 1:
+            runpy.run_path(paths[1], init_globals=g, run_name="__main__")
+    except Exception as e:
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename not in paths:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        sys.exit(1)
+'''
+_RUN_WITH_TESTS = _RUNNER + "run_files(sys.argv[1:])\n"
+
+# "fork" runs each snippet in a child forked from a warm helper interpreter, skipping
+# interpreter startup; "subprocess" launches a fresh python per run
+SANDBOX = os.environ.get("CODERLANG_SANDBOX", "fork")
+RUN_TIMEOUT_S = 10
+# Per-stream output bound, so a runaway print loop cannot fill memory or disk before the timeout
+MAX_OUTPUT_BYTES = 1 << 20
+
+# The helper reads one JSON request per line, forks a child that runs the files through
+# _RUNNER with stdout/stderr sent to files, and replies (timed_out, return_code).
+# SystemExit ends the child through the normal interpreter exit path.
+# RLIMIT_FSIZE caps what the child can write; past it, writes fail with "File too large".
+_FORK_SERVER = _RUNNER + r'''
+import json, resource, select, signal, struct
+
+def run(req):
+    resource.setrlimit(resource.RLIMIT_FSIZE, (req["cap"], req["cap"]))
+    for fd, path, flags in ((0, os.devnull, os.O_RDONLY), (1, req["out"], os.O_WRONLY | os.O_TRUNC), (2, req["err"], os.O_WRONLY | os.O_TRUNC)):
+        new_fd = os.open(path, flags)
+        os.dup2(new_fd, fd)
+        os.close(new_fd)
+    run_files(req["argv"])
+
+for line in sys.stdin:
+    req = json.loads(line)
+    pid = os.fork()
+    if pid == 0:
+        run(req)
+        sys.exit(0)
+    pidfd = os.pidfd_open(pid)
+    timed_out = not select.select([pidfd], [], [], req["timeout"])[0]
+    if timed_out:
+        os.kill(pid, signal.SIGKILL)
+    os.close(pidfd)
+    _, status = os.waitpid(pid, 0)
+    os.write(1, struct.pack("!?i", timed_out, os.waitstatus_to_exitcode(status)))
+'''
+_REPLY = struct.Struct("!?i")
+
+# pidfd_open is Linux-only; elsewhere every run uses a subprocess
+_USE_FORK = SANDBOX == "fork" and hasattr(os, "pidfd_open")
+_WORKER = None
+_WORKER_LOCK = threading.Lock()
+
+# blake2b(code, tests) -> result of a completed memoize=True run, in LRU order
+MAX_CACHED_RUNS = 256
+_RUN_CACHE = OrderedDict()
+_RUN_CACHE_LOCK = threading.Lock()
+
+def _as_bytes(source) -> bytes:
+    return source if isinstance(source, bytes) else source.encode("utf-8")
+
+def _run_key(code_bytes: bytes, test_bytes: bytes) -> bytes:
+    h = hashlib.blake2b(code_bytes, digest_size=16)
+    if test_bytes is not None:
+        h.update(b"\0")
+        h.update(test_bytes)
+    return h.digest()
+
+class _Lazy:
+    """Log argument whose string is only built if a handler actually formats the record."""
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __str__(self):
+        return self.fn()
+
+def _snippet(text: str, limit: int = 200) -> str:
+    return text[:limit].replace("\n", " ") if text else ""
+
+def clear_run_cache():
+    """Drops all memoized run_python_code results."""
+    with _RUN_CACHE_LOCK:
+        _RUN_CACHE.clear()
+
+# Per-thread scratch files, reused across runs: each is created once with mkstemp and
+# overwritten in place afterwards, instead of a create/unlink pair per file per run.
+# Runs on one thread are sequential, so a file is never rewritten while a run reads it.
+_SCRATCH = threading.local()
+_SCRATCH_PATHS = []
+_SCRATCH_LOCK = threading.Lock()
+
+def _scratch_path(suffix: str) -> str:
+    paths = getattr(_SCRATCH, "paths", None)
+    if paths is None:
+        paths = _SCRATCH.paths = {}
+    path = paths.get(suffix)
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix="coderlang_")
+        os.close(fd)
+        paths[suffix] = path
+        with _SCRATCH_LOCK:
+            _SCRATCH_PATHS.append(path)
+    return path
+
+def _write_scratch(source: bytes, suffix: str) -> str:
+    path = _scratch_path(suffix)
+    with open(path, "wb") as f:
+        f.write(source)
+    return path
+
+@atexit.register
+def _remove_scratch_files():
+    with _SCRATCH_LOCK:
+        for path in _SCRATCH_PATHS:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        _SCRATCH_PATHS.clear()
+
+def run_python_code(code_string, test_code=None, memoize: bool = False) -> dict:
     """
-    Executes a string of Python code in a sandboxed subprocess.
+    Executes a string of Python code in a separate process: a child forked from a warm
+    helper interpreter on Linux, or a fresh subprocess (CODERLANG_SANDBOX=subprocess).
     
     Args:
-        code_string: The Python code to execute.
+        code_string: The Python code to execute (str, or UTF-8 bytes).
+        test_code: Optional test code (str or bytes) run after code_string in the same
+            namespace. Kept in its own file so callers never concatenate the two; callers
+            re-testing several candidates can encode the tests once and pass bytes.
+        memoize: Reuse the result of an earlier memoized run of identical code and tests.
+            Only for deterministic code, e.g. re-testing after a debug pass that left the
+            code unchanged; anything using randomness, time, files or the network must
+            run fresh, so this is off by default.
         
     Returns:
         A dictionary containing:
         - 'stdout' (str): The standard output.
         - 'stderr' (str): The standard error (or None if no error).
         - 'return_code' (int): The exit code of the process.
+
+    Code or tests that do not parse are rejected before any process is started.
+    With memoize=True, runs that complete (i.e. do not time out or fail to launch) are
+    cached by a content hash of the code and tests; clear_run_cache() drops them.
     """
     log.info("Received request to execute code.")
-    
+
+    # Encode once; the same bytes feed the cache key and the temp files
+    code_bytes = _as_bytes(code_string)
+    test_bytes = None if test_code is None else _as_bytes(test_code)
+    if memoize:
+        key = _run_key(code_bytes, test_bytes)
+        with _RUN_CACHE_LOCK:
+            cached = _RUN_CACHE.get(key)
+            if cached is not None:
+                _RUN_CACHE.move_to_end(key)
+        if cached is not None:
+            log.info("Returning memoized result for identical code.")
+            return dict(cached)
+
+    result = _syntax_check(code_bytes, test_bytes)
+    completed = True
+    if result is None:
+        result, completed = _execute(code_bytes, test_bytes)
+    if memoize and completed:
+        with _RUN_CACHE_LOCK:
+            _RUN_CACHE[key] = dict(result)
+            if len(_RUN_CACHE) > MAX_CACHED_RUNS:
+                _RUN_CACHE.popitem(last=False)
+    return result
+
+def _syntax_check(code_bytes: bytes, test_bytes: bytes):
+    """
+    Parses the code and tests in-process so a SyntaxError fails fast without
+    spawning an interpreter. Returns the failed-run result, or None if both parse.
+    Nothing is executed here; valid code always runs in a separate process.
+    """
+    sources = [(code_bytes, 'code.py')]
+    if test_bytes is not None:
+        sources.append((test_bytes, 'tests.py'))
+    for source, filename in sources:
+        try:
+            ast.parse(source, filename=filename)
+        except (SyntaxError, ValueError) as e:
+            log.warning("Skipping execution, %s does not parse: %s", filename, e)
+            return {
+                "stdout": "",
+                "stderr": "".join(traceback.format_exception_only(type(e), e)),
+                "return_code": 1
+            }
+    return None
+
+def _read_output(path: str) -> tuple:
+    """Returns (text, truncated) for a capped output file."""
+    with open(path, "rb") as f:
+        data = f.read(MAX_OUTPUT_BYTES)
+    return data.decode("utf-8", errors="replace"), len(data) >= MAX_OUTPUT_BYTES
+
+def run_capped(cmd: list, timeout: float, cap: int = MAX_OUTPUT_BYTES, env: dict = None) -> tuple:
+    """
+    Like subprocess.run(cmd, capture_output=True, text=True, timeout=timeout), but keeps at
+    most `cap` bytes of stdout and of stderr and kills the process as soon as either overflows.
+    stdin is /dev/null, so input() fails fast instead of blocking on ours.
+    Returns (CompletedProcess, truncated). Raises subprocess.TimeoutExpired like subprocess.run.
+    """
+    deadline = time.monotonic() + timeout
+    truncated = False
+    with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env) as proc:
+        buffers = {proc.stdout: bytearray(), proc.stderr: bytearray()}
+        with selectors.DefaultSelector() as sel:
+            for stream in buffers:
+                sel.register(stream, selectors.EVENT_READ)
+            while sel.get_map() and not truncated:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    proc.kill()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                for key, _ in sel.select(remaining):
+                    chunk = os.read(key.fd, 1 << 16)
+                    if not chunk:
+                        sel.unregister(key.fileobj)
+                        continue
+                    buf = buffers[key.fileobj]
+                    buf += chunk
+                    if len(buf) > cap:
+                        del buf[cap:]
+                        truncated = True
+        if truncated:
+            proc.kill()
+        try:
+            return_code = proc.wait(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            raise
+    stdout, stderr = (bytes(buffers[s]).decode("utf-8", errors="replace") for s in (proc.stdout, proc.stderr))
+    return subprocess.CompletedProcess(cmd, return_code, stdout, stderr), truncated
+
+def _run_subprocess(temp_paths: list) -> tuple:
+    """Runs the files in a fresh interpreter; returns (stdout, stderr, return_code, truncated)."""
+    if len(temp_paths) == 1:
+        cmd = ['python', temp_paths[0]]
+    else:
+        cmd = ['python', '-c', _RUN_WITH_TESTS, *temp_paths]
+    # Safety: the timeout prevents long-running/infinite loops, the cap runaway output
+    result, truncated = run_capped(cmd, timeout=RUN_TIMEOUT_S)
+    return result.stdout, result.stderr, result.returncode, truncated
+
+def _run_forked(temp_paths: list):
+    """
+    Runs the files in a child of the warm fork server; returns (stdout, stderr, return_code,
+    truncated), or None if the server is busy or the request could not be delivered, so the
+    caller uses a subprocess. Once delivered the code may already have run, so a lost reply is
+    reported as a failed run rather than retried.
+    Raises subprocess.TimeoutExpired if the child had to be killed.
+    """
+    global _WORKER
+    if not _WORKER_LOCK.acquire(blocking=False):
+        return None
+    # The child truncates these when it opens them
+    out_paths = [_scratch_path('.out'), _scratch_path('.err')]
+    delivered = False
+    try:
+        if _WORKER is None or _WORKER.poll() is not None:
+            _WORKER = subprocess.Popen(['python', '-c', _FORK_SERVER], stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        request = {
+            "argv": temp_paths, "out": out_paths[0], "err": out_paths[1],
+            "timeout": RUN_TIMEOUT_S, "cap": MAX_OUTPUT_BYTES,
+        }
+        _WORKER.stdin.write(json.dumps(request).encode("utf-8") + b"\n")
+        delivered = True
+        # The server replies within the run timeout; extra slack covers the kill and reap
+        fd = _WORKER.stdout.fileno()
+        if not select.select([fd], [], [], RUN_TIMEOUT_S + 5)[0]:
+            raise OSError("fork server did not reply")
+        reply = os.read(fd, _REPLY.size)
+        if len(reply) != _REPLY.size:
+            raise OSError("fork server closed its pipe")
+        timed_out, return_code = _REPLY.unpack(reply)
+        if timed_out:
+            raise subprocess.TimeoutExpired(temp_paths, RUN_TIMEOUT_S)
+        (stdout, out_truncated), (stderr, err_truncated) = map(_read_output, out_paths)
+        return stdout, stderr, return_code, out_truncated or err_truncated
+    except OSError as e:
+        if _WORKER is not None:
+            _WORKER.kill()
+            _WORKER = None
+        if delivered:
+            log.error("Fork server failed after receiving the run (%s); not re-running it.", e)
+            return "", f"Error: The code runner stopped before reporting a result ({e}).", 1, False
+        log.warning("Fork server failed (%s); falling back to a subprocess.", e)
+        return None
+    finally:
+        _WORKER_LOCK.release()
+
+def _execute(code_bytes: bytes, test_bytes: bytes) -> tuple:
+    """Runs the code in a forked or fresh interpreter; returns (result, completed) where completed is False on timeout/launch errors."""
     # We use a temporary file to write the code and execute it.
     # This is more robust than passing a long string to the CLI.
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-        temp_file.write(code_string)
-        temp_path = temp_file.name
+    temp_paths = [_write_scratch(code_bytes, '.py')]
+    if test_bytes is not None:
+        temp_paths.append(_write_scratch(test_bytes, '_tests.py'))
 
-    log.info(f"Code written to temporary file: {temp_path}")
+    log.info("Code written to temporary file(s): %s", temp_paths)
     
     try:
-        # Execute the temporary file using 'python'
-        # We set a timeout (e.g., 10 seconds) for safety.
-        result = subprocess.run(
-            ['python', temp_path],
-            capture_output=True,
-            text=True,
-            timeout=10  # Safety: prevent long-running/infinite loops
+        outcome = _run_forked(temp_paths) if _USE_FORK else None
+        if outcome is None:
+            outcome = _run_subprocess(temp_paths)
+        stdout, stderr, return_code, truncated = outcome
+        if truncated:
+            stderr += f"\nError: Output exceeded {MAX_OUTPUT_BYTES} bytes; execution was stopped."
+
+        # One record per run; snippets are only sliced if the record is emitted
+        log.log(
+            logging.WARNING if stderr else logging.INFO,
+            "Code execution finished: return_code=%s stdout=%s stderr=%s",
+            return_code, _Lazy(lambda: _snippet(stdout)), _Lazy(lambda: _snippet(stderr)),
+            extra={"return_code": return_code, "stdout_len": len(stdout), "stderr_len": len(stderr)},
         )
-        
-        stdout = result.stdout
-        stderr = result.stderr
-        return_code = result.returncode
-
-        log.info(f"Code execution finished with return code: {return_code}")
-        if stdout:
-            log.info(f"STDOUT: {stdout[:200]}...") # Log snippet
-        if stderr:
-            log.warning(f"STDERR: {stderr[:200]}...") # Log snippet
-            
+
         return {
             "stdout": stdout,
             "stderr": stderr,
             "return_code": return_code
-        }
+        }, True
 
     except subprocess.TimeoutExpired:
         log.error("Code execution TIMED OUT.")
         return {
             "stdout": "",
-            "stderr": "Error: Code execution timed out after 10 seconds.",
+            "stderr": f"Error: Code execution timed out after {RUN_TIMEOUT_S} seconds.",
             "return_code": 1
-        }
+        }, False
     except Exception as e:
         log.error(f"An unexpected error occurred during execution: {e}")
         return {
             "stdout": "",
             "stderr": f"An unexpected error occurred: {e}",
             "return_code": 1
-        }
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-            log.info(f"Temporary file {temp_path} cleaned up.")
\ No newline at end of file
+        }, False
@@ -1,8 +1,51 @@
 import logging
 import os
+from html.parser import HTMLParser
+
+import requests
+
+# C-backed parsers are much faster at text extraction; html.parser is the stdlib fallback
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser
+except ImportError:
+    _SelectolaxParser = None
+try:
+    import lxml.html as _lxml_html
+except ImportError:
+    _lxml_html = None
 
 log = logging.getLogger(__name__)
 
+MAX_TEXT_CHARS = 5000
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+
+class _TextCollector(HTMLParser):
+    """Basic HTML stripper that stops collecting once `limit` characters are gathered."""
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.size = 0
+        self.text = []
+
+    def handle_data(self, d):
+        if self.size < self.limit:
+            self.text.append(d)
+            self.size += len(d)
+
+    def get_data(self):
+        return "".join(self.text)
+
+def _html_to_text(html: str) -> str:
+    if _SelectolaxParser is not None:
+        text = _SelectolaxParser(html).text(separator=" ", strip=True)
+    elif _lxml_html is not None:
+        text = _lxml_html.fromstring(html).text_content()
+    else:
+        parser = _TextCollector(MAX_TEXT_CHARS)
+        parser.feed(html)
+        text = parser.get_data()
+    return text[:MAX_TEXT_CHARS]
+
 class SearchTool:
     """
     A standalone search tool wrapper.
@@ -35,29 +78,20 @@ class SearchTool:
         """
         A utility to fetch text from a specific URL.
         Useful if the ResearchAgent finds a link and wants to read it.
+        Returns at most MAX_TEXT_CHARS characters of page text.
         """
         try:
-            import urllib.request
-            from html.parser import HTMLParser
-            
-            # Basic HTML stripper
-            class MLStripper(HTMLParser):
-                def __init__(self):
-                    super().__init__()
-                    self.reset()
-                    self.strict = False
-                    self.convert_charrefs= True
-                    self.text = []
-                def handle_data(self, d):
-                    self.text.append(d)
-                def get_data(self):
-                    return "".join(self.text)
-
-            with urllib.request.urlopen(url) as response:
-                html = response.read().decode('utf-8')
-                s = MLStripper()
-                s.feed(html)
-                return s.get_data()[:5000] # Limit to 5k chars
+            # Stream the body so an oversized page is cut off at MAX_PAGE_BYTES
+            with requests.get(url, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                body = response.raw.read(MAX_PAGE_BYTES, decode_content=True)
+                # requests reports ISO-8859-1 for text/* without a charset; only trust a declared one
+                declared = 'charset=' in response.headers.get('Content-Type', '').lower()
+                try:
+                    html = body.decode(response.encoding if declared else 'utf-8', errors='replace')
+                except LookupError:  # unknown charset name
+                    html = body.decode('utf-8', errors='replace')
+            return _html_to_text(html)
         except Exception as e:
             log.error(f"Failed to scrape {url}: {e}")
             return f"Error reading URL: {e}"
\ No newline at end of file
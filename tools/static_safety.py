@@ -0,0 +1,98 @@
+import ast
+import logging
+from typing import List, Optional
+
+log = logging.getLogger(__name__)
+
+# Builtins that run arbitrary code, reach into interpreter internals or touch the filesystem
+RISKY_CALLS = frozenset({
+    "eval", "exec", "compile", "__import__", "open",
+    "getattr", "setattr", "delattr", "globals", "vars", "breakpoint",
+})
+
+# Modules that give generated code process, network, filesystem, FFI or interpreter access
+RISKY_MODULES = frozenset({
+    "os", "posix", "nt", "sys", "subprocess", "_posixsubprocess", "shutil", "socket", "socketserver",
+    "ssl", "select", "selectors", "ctypes", "mmap", "fcntl", "resource", "multiprocessing",
+    "threading", "_thread", "signal", "pty", "pickle", "marshal", "shelve", "dbm", "importlib",
+    "pkgutil", "zipimport", "runpy", "code", "codeop", "builtins", "inspect", "gc", "io", "_io",
+    "codecs", "pathlib", "tempfile", "glob", "fileinput", "zipfile", "tarfile", "sqlite3",
+    "logging", "webbrowser", "requests", "urllib", "http", "xmlrpc", "ftplib", "smtplib",
+    "telnetlib", "asyncio",
+})
+
+# Dunder attributes used to escape restricted namespaces
+RISKY_ATTRS = frozenset({
+    "__globals__", "__builtins__", "__subclasses__", "__code__", "__getattribute__",
+    "__bases__", "__mro__", "__loader__", "__spec__",
+})
+
+# itertools constructors that never stop on their own
+_ENDLESS_ITERATORS = frozenset({"count", "cycle", "repeat"})
+
+# Exponents above this are treated as an attempt to exhaust CPU or memory
+MAX_CONST_EXPONENT = 10_000
+
+def _is_constant_true(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and bool(node.value)
+
+def _has_break(node: ast.AST) -> bool:
+    return any(isinstance(n, ast.Break) for n in ast.walk(node))
+
+def _is_endless_iterator(node: ast.AST) -> bool:
+    """count(...), cycle(...) or repeat(x) with no times argument, bare or as itertools.<name>."""
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+    if name not in _ENDLESS_ITERATORS:
+        return False
+    return name != "repeat" or (len(node.args) < 2 and not node.keywords)
+
+def _is_huge_power(node: ast.BinOp) -> bool:
+    """A ** whose exponent is another ** or a large constant, e.g. 10**10**10."""
+    exp = node.right
+    if isinstance(exp, ast.BinOp) and isinstance(exp.op, ast.Pow):
+        return True
+    return isinstance(exp, ast.Constant) and isinstance(exp.value, (int, float)) and exp.value > MAX_CONST_EXPONENT
+
+def find_risky_constructs(code: str) -> Optional[List[str]]:
+    """
+    Screens code without running it.
+    Returns a description of every risky construct found ([] if none), or None if the
+    code does not parse and therefore cannot be screened locally.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+    findings = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            findings.extend(f"import {a.name}" for a in node.names if a.name.split(".")[0] in RISKY_MODULES)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and node.module.split(".")[0] in RISKY_MODULES:
+                findings.append(f"from {node.module} import ...")
+        elif isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name) and node.func.id in RISKY_CALLS:
+                findings.append(f"call to {node.func.id}()")
+        elif isinstance(node, ast.Attribute):
+            if node.attr in RISKY_ATTRS:
+                findings.append(f"access to {node.attr}")
+            elif node.attr == "modules" and isinstance(node.value, ast.Name) and node.value.id == "sys":
+                findings.append("access to sys.modules")
+        elif isinstance(node, ast.While):
+            # An unconditional loop with no break can only end by an exception or exit
+            if _is_constant_true(node.test) and not _has_break(node):
+                findings.append(f"while-true loop without break (line {node.lineno})")
+        elif isinstance(node, ast.For):
+            if _is_endless_iterator(node.iter) and not _has_break(node):
+                findings.append(f"loop over an endless iterator without break (line {node.lineno})")
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            if _is_huge_power(node):
+                findings.append(f"huge exponentiation (line {node.lineno})")
+
+    if findings:
+        log.info("Static safety check flagged: %s", findings)
+    return findings
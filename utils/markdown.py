@@ -0,0 +1,16 @@
+import re
+
+# A leading ```lang fence line (any language tag, e.g. python, cpp, c++)
+_OPEN_FENCE_RE = re.compile(r"```[\w+#.-]*[ \t]*\n?")
+
+def strip_code_fences(text: str) -> str:
+    """
+    Removes the markdown fences wrapping an LLM code reply.
+    Only the two ends are inspected: an anchored match for the opening fence and a
+    suffix check for the closing one, so the body is never scanned.
+    """
+    text = text.strip()
+    opening = _OPEN_FENCE_RE.match(text)
+    if opening:
+        text = text[opening.end():]
+    return text.removesuffix("```").strip()
@@ -3,9 +3,43 @@ import shutil
 import subprocess
 import tempfile
 import logging
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Only needed for the ZIP fallback when git is unavailable
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
 
 log = logging.getLogger(__name__)
 
+# Per-file bound when files are read into an LLM prompt; larger files are mostly data blobs
+MAX_FILE_CHARS = 100_000
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def _http_session():
+    """
+    Process-wide requests session, so branch probes and successive fetches reuse
+    pooled TCP/TLS connections. Transient gateway errors are retried briefly.
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _SESSION = session
+    return _SESSION
+
 class RepoLoader:
     def __init__(self, cache_dir="repo_cache"):
         self.cache_dir = cache_dir
@@ -65,11 +99,9 @@ class RepoLoader:
             log.warning(f"{git_error}. Falling back to ZIP download.")
             
         # Method 2: ZIP Download (Fallback)
+        if requests is None:
+            return None, f"Git error: {git_error}\n\n'requests' library is missing. Please rebuild Docker image with updated requirements.txt"
         try:
-            import requests
-            import zipfile
-            import io
-            
             # Use clean URL (without .git) for ZIP download
             base_url = clean_url
             
@@ -77,40 +109,54 @@ class RepoLoader:
             branches = ["main", "master", "dev", "develop", "trunk"]
             last_error = None
             
+            session = _http_session()
             headers = {}
             if github_token:
                 headers["Authorization"] = f"token {github_token}"
             
-            for branch in branches:
+            def probe(branch):
                 zip_url = f"{base_url}/archive/refs/heads/{branch}.zip"
-                try:
-                    log.info(f"Attempting to download from {zip_url}")
-                    r = requests.get(zip_url, timeout=15, headers=headers)
-                    if r.status_code == 200:
-                        z = zipfile.ZipFile(io.BytesIO(r.content))
-                        z.extractall(self.cache_dir)
-                        # The zip usually extracts to 'repo-branch', so we need to find it and rename/move
-                        extracted_name = z.namelist()[0].split('/')[0]
-                        extracted_path = os.path.join(self.cache_dir, extracted_name)
-                        
-                        if os.path.exists(target_dir):
-                             shutil.rmtree(target_dir)
-                        shutil.move(extracted_path, target_dir)
-                        log.info(f"Successfully downloaded repo from {branch} branch")
-                        return target_dir, None
-                    elif r.status_code == 404:
-                        last_error = f"Branch '{branch}' not found"
-                        log.debug(f"{last_error} at {zip_url}")
-                    else:
-                        last_error = f"HTTP {r.status_code} for branch '{branch}'"
-                        log.debug(f"{last_error}")
-                except requests.exceptions.RequestException as e:
-                    last_error = f"Network error: {str(e)}"
-                    log.debug(f"Request failed for {zip_url}: {e}")
-                except Exception as e:
-                    last_error = f"Error processing {branch}: {str(e)}"
-                    log.debug(f"Failed to download from {zip_url}: {e}")
-                    continue
+                return session.head(zip_url, timeout=5, headers=headers, allow_redirects=True).status_code
+
+            # Probe every branch at once, then take the first existing one in preference order,
+            # so missing branches no longer cost a serial round-trip each
+            probe_pool = ThreadPoolExecutor(max_workers=len(branches))
+            probes = [probe_pool.submit(probe, branch) for branch in branches]
+            try:
+                for branch, probe_future in zip(branches, probes):
+                    zip_url = f"{base_url}/archive/refs/heads/{branch}.zip"
+                    try:
+                        status = probe_future.result()
+                        if status == 200:
+                            log.info(f"Attempting to download from {zip_url}")
+                            with session.get(zip_url, timeout=15, headers=headers, stream=True) as r:
+                                status = r.status_code
+                                if status == 200:
+                                    # Spool the archive to disk in 64 KiB chunks so memory stays flat for large repos
+                                    with tempfile.TemporaryFile(suffix=".zip") as archive:
+                                        for chunk in r.iter_content(chunk_size=1 << 16):
+                                            archive.write(chunk)
+                                        with zipfile.ZipFile(archive) as z:
+                                            self._extract_into(z, target_dir)
+                        if status == 200:
+                            log.info(f"Successfully downloaded repo from {branch} branch")
+                            return target_dir, None
+                        elif status == 404:
+                            last_error = f"Branch '{branch}' not found"
+                            log.debug(f"{last_error} at {zip_url}")
+                        else:
+                            last_error = f"HTTP {status} for branch '{branch}'"
+                            log.debug(f"{last_error}")
+                    except requests.exceptions.RequestException as e:
+                        last_error = f"Network error: {str(e)}"
+                        log.debug(f"Request failed for {zip_url}: {e}")
+                    except Exception as e:
+                        last_error = f"Error processing {branch}: {str(e)}"
+                        log.debug(f"Failed to download from {zip_url}: {e}")
+                        continue
+            finally:
+                # Don't wait for probes of branches we no longer need
+                probe_pool.shutdown(wait=False, cancel_futures=True)
             
             # All attempts failed
             error_msg = f"Failed to download repository.\n\n"
@@ -123,30 +169,63 @@ class RepoLoader:
             
             return None, error_msg
             
-        except ImportError:
-            return None, f"Git error: {git_error}\n\n'requests' library is missing. Please rebuild Docker image with updated requirements.txt"
         except Exception as e:
             return None, f"Unexpected error: {str(e)}"
 
+    @staticmethod
+    def _extract_into(z, target_dir):
+        """
+        Extracts a GitHub archive, which wraps everything in one 'repo-branch/' directory,
+        straight into target_dir with that prefix stripped, so nothing has to be moved after.
+        """
+        prefix = z.namelist()[0].split('/')[0] + '/'
+        # target_dir was cleared above; only a leftover from a partial clone can be here
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir)
+        for info in z.infolist():
+            if not info.filename.startswith(prefix):
+                continue
+            info.filename = info.filename[len(prefix):]
+            if info.filename:
+                z.extract(info, target_dir)
+
     def get_file_tree(self, repo_path):
         """Returns a list of all files in the repo."""
+        # Iterative scandir walk; entry paths all start with repo_path, so slicing the
+        # prefix off gives the relative path without relpath's normalisation
+        prefix_len = len(os.path.join(repo_path, ""))
         file_list = []
-        for root, dirs, files in os.walk(repo_path):
-            # Skip .git
-            if ".git" in dirs:
-                dirs.remove(".git")
-                
-            for file in files:
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, repo_path)
-                file_list.append(rel_path)
+        stack = [repo_path]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                # os.walk silently skips unreadable directories too
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        # Like os.walk: skip .git and don't descend into symlinked dirs
+                        if entry.name != ".git" and not entry.is_symlink():
+                            stack.append(entry.path)
+                    else:
+                        file_list.append(entry.path[prefix_len:])
         return sorted(file_list)
 
-    def read_file(self, repo_path, rel_path):
-        """Reads the content of a specific file."""
+    def read_file(self, repo_path, rel_path, max_chars=None):
+        """
+        Reads the content of a specific file.
+        With max_chars, only that much is read and decoded, so a huge file is never
+        materialised in full; truncated content ends with a marker line.
+        """
         full_path = os.path.join(repo_path, rel_path)
         try:
             with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
+                if max_chars is None:
+                    return f.read()
+                content = f.read(max_chars + 1)
+            if len(content) > max_chars:
+                content = content[:max_chars] + f"\n... [truncated after {max_chars} characters]"
+            return content
         except Exception as e:
             return f"Error reading file: {e}"